@@ -0,0 +1,252 @@
+"""
+Article Store
+Persistent, deduplicated history of every article the scrapers have seen
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import db
+from article import Article
+from settings import load_settings, state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    key TEXT PRIMARY KEY,
+    link TEXT,
+    title TEXT,
+    company TEXT,
+    source TEXT,
+    first_seen_run INTEGER NOT NULL,
+    last_seen_run INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    published INTEGER
+);
+CREATE INDEX IF NOT EXISTS articles_first_seen ON articles (first_seen_run);
+CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5(
+    title, description, company UNINDEXED, seen_at UNINDEXED, tokenize = 'porter unicode61'
+);
+"""
+
+# Rank by bm25 with a match in the title worth ten in the description
+SEARCH_RANK = 'bm25(10.0, 1.0)'
+
+SEARCH_TOKEN_RE = re.compile(r'\w+\*?')
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = {'ref', 'fbclid', 'gclid'}
+
+# JSON files the standalone scrapers wrote before the store existed, and the
+# competitor their posts belong to
+LEGACY_DIR = os.path.dirname(os.path.abspath(__file__))
+LEGACY_EXPORTS = {'google_ai_posts.json': 'Google AI', 'openai_posts.json': 'OpenAI'}
+
+
+def normalize_link(link):
+    """Canonical form of an article URL used for deduplication"""
+    parts = urlsplit(link.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query)
+             if not (k.lower().startswith('utm_') or k.lower() in TRACKING_PARAMS)]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def article_key(article):
+    """Dedup key: the normalized link, or a content hash for link-less articles"""
+    if article.link:
+        return normalize_link(article.link)
+
+    content = '\x1f'.join(getattr(article, field).strip().lower()
+                          for field in ('company', 'source', 'title'))
+    return 'sha1:' + hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class ArticleStore:
+    """SQLite-backed article history keyed by article_key
+
+    Each scrape opens a run; upserting is a primary-key lookup per article, and
+    "what is new since run N" is answered from the first_seen_run index.
+    """
+
+    def __init__(self, path):
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.add_published_column()
+        self.conn.execute("INSERT INTO article_search (article_search, rank) VALUES ('rank', ?)",
+                          (SEARCH_RANK,))
+        self.lock = threading.Lock()
+        self.index_history()
+        self.import_legacy()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the store configured in config.json settings"""
+        return cls(state_path(settings, 'articles.db'))
+
+    def start_run(self, source):
+        """Record the start of a scrape and return its run id"""
+        with self.lock:
+            cursor = self.conn.execute('INSERT INTO runs (source, started_at) VALUES (?, ?)',
+                                       (source, datetime.now().isoformat()))
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def run_started(self, run_id):
+        row = self.conn.execute('SELECT started_at FROM runs WHERE id = ?', (run_id,)).fetchone()
+        return row[0] if row else ''
+
+    def last_run(self, source):
+        """Id of the most recent run recorded for source, or 0"""
+        row = self.conn.execute('SELECT MAX(id) FROM runs WHERE source = ?', (source,)).fetchone()
+        return row[0] or 0
+
+    def upsert(self, articles, run_id):
+        """Add articles to the history and return the ones never seen before"""
+        new_articles = []
+
+        with self.lock:
+            seen_at = self.run_started(run_id)
+            for article in articles:
+                key = article_key(article)
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, article.link, article.title, article.company, article.source,
+                     run_id, run_id, json.dumps(article.to_dict(), separators=(',', ':')),
+                     article.published or None))
+
+                if cursor.rowcount:
+                    new_articles.append(article)
+                    self.conn.execute(
+                        'INSERT INTO article_search (rowid, title, description, company, seen_at) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (cursor.lastrowid, article.title, article.description, article.company,
+                         seen_at))
+                else:
+                    self.conn.execute('UPDATE articles SET last_seen_run = ? WHERE key = ?',
+                                      (run_id, key))
+            self.conn.commit()
+
+        return new_articles
+
+    def new_since(self, run_id):
+        """Articles first seen after run_id, oldest first"""
+        rows = self.conn.execute(
+            'SELECT data FROM articles WHERE first_seen_run > ? ORDER BY first_seen_run, rowid',
+            (run_id,))
+        return [Article.from_dict(json.loads(data)) for (data,) in rows]
+
+    def count(self):
+        """Number of distinct articles in the history"""
+        return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def add_published_column(self):
+        """Give a history from before dates were normalized its published column"""
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(articles)')]
+        if 'published' not in columns:
+            self.conn.execute('ALTER TABLE articles ADD COLUMN published INTEGER')
+            rows = self.conn.execute('SELECT key, data FROM articles').fetchall()
+            self.conn.executemany(
+                'UPDATE articles SET published = ? WHERE key = ?',
+                [(Article.from_dict(json.loads(data)).published or None, key) for key, data in rows])
+        self.conn.execute('CREATE INDEX IF NOT EXISTS articles_published ON articles (published)')
+        self.conn.commit()
+
+    def index_history(self):
+        """Add articles stored before the search index existed to it"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO article_search (rowid, title, description, company, seen_at) "
+                "SELECT a.rowid, a.title, COALESCE(json_extract(a.data, '$.description'), ''), "
+                "a.company, r.started_at FROM articles a JOIN runs r ON r.id = a.first_seen_run "
+                "WHERE a.rowid > "
+                "COALESCE((SELECT rowid FROM article_search ORDER BY rowid DESC LIMIT 1), 0)")
+            self.conn.commit()
+
+    def import_legacy(self, directory=LEGACY_DIR):
+        """Add the posts of the old JSON exports to the history, once per file
+
+        Each file is imported as its own run, so its posts don't show up as new
+        in the first scan. Missing files are skipped.
+        """
+        for filename, company in LEGACY_EXPORTS.items():
+            path = os.path.join(directory, filename)
+            source = f'import:{filename}'
+            if not os.path.exists(path) or self.last_run(source):
+                continue
+            try:
+                with open(path) as f:
+                    posts = json.load(f)
+                articles = [Article.from_dict(dict(post, company=post.get('company') or company))
+                            for post in posts]
+            except Exception as e:
+                print(f"Could not import {filename}: {e}")
+                continue
+            self.upsert(articles, self.start_run(source))
+            print(f"Imported {len(articles)} posts from {filename}")
+
+    def search(self, query, company=None, since=None, limit=20):
+        """Articles matching query, best first, optionally from one company or published since a datetime
+
+        Every word of the query has to match (in any inflection: "agents"
+        finds "agent"); a trailing * matches prefixes. Articles without a
+        readable date count as published when they were first seen. A naive
+        since is taken as UTC, like the stored publication dates.
+        """
+        match = search_query(query)
+        if not match:
+            return []
+
+        if since is None:
+            # Filter and rank inside the index and only look up the rows that are returned
+            where = 'article_search MATCH ?'
+            params = [match]
+            if company:
+                where += ' AND company = ? COLLATE NOCASE'
+                params.append(company)
+            params.append(limit)
+            sql = (f'SELECT a.data FROM (SELECT rowid, rank FROM article_search WHERE {where} '
+                   f'ORDER BY rank LIMIT ?) s JOIN articles a ON a.rowid = s.rowid ORDER BY s.rank')
+        else:
+            # seen_at is local time; the 'utc' modifier makes it comparable to published
+            where = ("s.article_search MATCH ? AND COALESCE(a.published, "
+                     "CAST(strftime('%s', s.seen_at, 'utc') AS INTEGER)) >= ?")
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            params = [match, int(since.timestamp())]
+            if company:
+                where += ' AND s.company = ? COLLATE NOCASE'
+                params.append(company)
+            params.append(limit)
+            sql = (f'SELECT a.data FROM article_search s JOIN articles a ON a.rowid = s.rowid '
+                   f'WHERE {where} ORDER BY s.rank LIMIT ?')
+
+        return [Article.from_dict(json.loads(data)) for (data,) in self.conn.execute(sql, params)]
+
+
+def search_query(text):
+    """FTS5 query matching every word of text, so punctuation like "gpt-4" can't be a syntax error"""
+    terms = []
+    for token in SEARCH_TOKEN_RE.findall(text):
+        word = token.rstrip('*')
+        terms.append(f'"{word}"*' if token.endswith('*') else f'"{word}"')
+    return ' '.join(terms)
+
+
+def save_posts(posts, source):
+    """Record one scrape's posts in the article store and report what was new"""
+    store = ArticleStore.from_settings(load_settings())
+    run_id = store.start_run(source)
+    new_posts = store.upsert(posts, run_id)
+    print(f"\nSaved {len(posts)} posts to article store ({len(new_posts)} new, "
+          f"{store.count()} total)")
+    return new_posts
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Article Record Benchmark
+Builds a large synthetic history the way the scrapers used to (one dict and
+one timestamp string per article) and as Article records, and compares the
+memory per article and the time to serialize and load it.
+
+Usage: python benchmarks/bench_articles.py [--count N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import article  # noqa: E402
+from article import Article  # noqa: E402
+
+COMPANIES = ['OpenAI', 'Google AI', 'Microsoft AI', 'Anthropic', 'Meta AI', 'DeepMind',
+             'Hugging Face', 'Cohere']
+
+
+def raw_fields(i):
+    """Field values as a scraper pulls them off a page: fresh strings every time"""
+    company = COMPANIES[i % len(COMPANIES)]
+    return {
+        'title': f'Post number {i} about models',
+        'link': f'https://example.com/{company.lower().replace(" ", "-")}/post-{i}',
+        'company': ''.join(company),
+        'description': f'Summary of post {i}',
+        'date': '2024-01-01',
+        'source': ''.join(f'{company} RSS'),
+    }
+
+
+def as_dicts(count):
+    """The old shape: a dict per article, each with its own timestamp"""
+    return [dict(raw_fields(i), scraped_at=datetime.now().isoformat()) for i in range(count)]
+
+
+def as_articles(count):
+    """Article records sharing one timestamp per batch of a site's worth"""
+    articles = []
+    for i in range(count):
+        if i % 10 == 0:
+            scraped_at = article.batch_timestamp()
+        articles.append(Article(scraped_at=scraped_at, **raw_fields(i)))
+    return articles
+
+
+def bytes_per_article(build, count):
+    """Traced allocation of building count articles, divided by count"""
+    tracemalloc.start()
+    records = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size / count
+
+
+def best_ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000, help='articles in the history')
+    args = parser.parse_args()
+
+    dict_size = bytes_per_article(as_dicts, args.count)
+    article_size = bytes_per_article(as_articles, args.count)
+    dicts = as_dicts(args.count)
+    articles = as_articles(args.count)
+    # The record itself plus its timestamp, leaving out the title, link and
+    # description strings both shapes have to keep
+    dict_overhead = sys.getsizeof(dicts[0]) + sys.getsizeof(dicts[0]['scraped_at'])
+    article_overhead = sys.getsizeof(articles[0]) + sys.getsizeof(articles[0].scraped_at) / 10
+    print(f"{'record':12} {'bytes/article':>14} {'record bytes':>13}")
+    print(f"{'dict':12} {dict_size:14.0f} {dict_overhead:13.0f}")
+    print(f"{'Article':12} {article_size:14.0f} {article_overhead:13.0f}  "
+          f"({dict_size / article_size:.1f}x smaller, record {dict_overhead / article_overhead:.1f}x)")
+    print(f"\n{'serializer':24} {'dump ms':>9} {'load ms':>9} {'KB':>8}")
+    text = json.dumps(dicts)
+    print(f"{'json (dicts)':24} {best_ms(lambda: json.dumps(dicts)):9.1f} "
+          f"{best_ms(lambda: json.loads(text)):9.1f} {len(text) / 1024:8.0f}")
+    text = article.dumps(articles)
+    print(f"{'article.dumps':24} {best_ms(lambda: article.dumps(articles)):9.1f} "
+          f"{best_ms(lambda: article.loads(text)):9.1f} {len(text) / 1024:8.0f}")
+    # What loads would cost without pausing the garbage collector
+    print(f"{'article.loads, gc on':24} {'':9} "
+          f"{best_ms(lambda: article.decode(json.loads(text))):9.1f} {len(text) / 1024:8.0f}")
+    data = article.pack(articles)
+    if data is None:
+        print(f"{'article.pack':24} msgpack not installed")
+    else:
+        print(f"{'article.pack':24} {best_ms(lambda: article.pack(articles)):9.1f} "
+              f"{best_ms(lambda: article.unpack(data)):9.1f} {len(data) / 1024:8.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+HTML Parser Backend Benchmark
+Runs every scraper's listing extraction over the saved page fixtures with each
+parser backend, checks that all backends extract the same articles, and
+reports the parse + extract time per page.
+
+Usage: python benchmarks/bench_html_parsers.py [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+
+import google_ai_scraper  # noqa: E402
+import html_parsing  # noqa: E402
+import openai_scraper  # noqa: E402
+from plugins import HtmlPlugin  # noqa: E402
+from scraper import CompetitorTracker  # noqa: E402
+
+
+def extraction_cases():
+    """(fixture, label, extract function) for every listing parser"""
+    tracker = CompetitorTracker(os.path.join(ROOT, 'config.json'))
+    plugin = HtmlPlugin('Example', {'url': 'https://example.com/blog'})
+    return [
+        ('generic_listing.html', 'plugins.HtmlPlugin.parse',
+         lambda content: plugin.parse(plugin.region(content, plugin.url, tracker.context),
+                                      plugin.url, tracker.context)),
+        ('google_ai_blog.html', 'google_ai_scraper.parse_google_ai_page',
+         lambda content: google_ai_scraper.parse_google_ai_page(content, 'https://blog.google/technology/ai/')),
+        ('openai_blog.html', 'openai_scraper.parse_openai_blog', openai_scraper.parse_openai_blog),
+    ]
+
+
+def comparable(articles):
+    """Drop the per-run timestamp so outputs from different backends compare equal"""
+    return [article.replace(scraped_at='') for article in articles]
+
+
+def run_case(extract, content, backend, repeat):
+    """Return (best seconds per run, extracted articles) for one backend"""
+    html_parsing.set_backend(backend)
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = extract(content)
+            best = min(best, time.perf_counter() - start)
+    return best, comparable(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='runs per case (best is reported)')
+    args = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'case':42} {'backend':12} {'ms':>8} {'speedup':>8}  articles")
+    for fixture, label, extract in extraction_cases():
+        with open(os.path.join(FIXTURES, fixture), 'rb') as f:
+            content = f.read()
+
+        baseline_time, baseline = run_case(extract, content, 'html.parser', args.repeat)
+        for backend in html_parsing.BACKENDS:
+            if backend == 'html.parser':
+                elapsed, articles = baseline_time, baseline
+            else:
+                elapsed, articles = run_case(extract, content, backend, args.repeat)
+            same = articles == baseline
+            mismatches += not same
+            print(f"{label:42} {backend:12} {elapsed * 1000:8.2f} {baseline_time / elapsed:7.1f}x"
+                  f"  {len(articles)}{'' if same else '  MISMATCH'}")
+
+    if mismatches:
+        print(f"\n{mismatches} backend(s) extracted different articles than html.parser")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
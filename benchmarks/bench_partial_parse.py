@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Partial Parse Benchmark
+Compares parsing whole listing pages with parsing only the head that holds the
+articles the scrapers keep, on the saved fixtures grown to several sizes. Checks
+that both extract the same articles and reports time, elements built and peak
+Python memory (the lxml.html tree lives in C memory, so count its elements).
+"cut ms" is cutting the head alone, which a scan does on its own thread
+before fingerprinting the head and handing it to a parse worker.
+
+Usage: python benchmarks/bench_partial_parse.py [--scales 1,10,50] [--repeat N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import google_ai_scraper  # noqa: E402
+import html_parsing  # noqa: E402
+import openai_scraper  # noqa: E402
+import plugins  # noqa: E402
+from extraction import WorkerHints  # noqa: E402
+from html_parsing import LxmlNode, parse_html  # noqa: E402
+from offline import scale_document  # noqa: E402
+
+GENERIC_URL = 'https://example.com/blog'
+GOOGLE_URL = 'https://blog.google/technology/ai/'
+
+
+def extraction_cases(hints):
+    """(fixture, label, extract from a parsed page, head of a page, parse function) per listing parser"""
+    return [
+        ('generic_listing.html', 'plugins.parse_listing',
+         lambda soup: plugins.extract_listing(soup, 'Example', GENERIC_URL, 5, hints),
+         lambda content: plugins.GENERIC_PLAN.head(content, 5, GENERIC_URL, hints),
+         lambda content: plugins.parse_listing(content, 'Example', GENERIC_URL, 5, hints)),
+        ('google_ai_blog.html', 'google_ai_scraper.parse_google_ai_page',
+         lambda soup: google_ai_scraper.extract_google_ai_page(soup, GOOGLE_URL, hints),
+         lambda content: google_ai_scraper.DIRECT_PLAN.head(content, google_ai_scraper.MAX_POSTS,
+                                                            GOOGLE_URL, hints),
+         lambda content: google_ai_scraper.parse_google_ai_page(content, GOOGLE_URL, hints)),
+        ('openai_blog.html', 'openai_scraper.parse_openai_blog',
+         lambda soup: openai_scraper.extract_openai_blog(soup, hints),
+         lambda content: openai_scraper.POST_PLAN.head(content, openai_scraper.MAX_POSTS,
+                                                       openai_scraper.BLOG_URL, hints),
+         lambda content: openai_scraper.parse_openai_blog(content, hints)),
+    ]
+
+
+def element_count(document):
+    if isinstance(document, LxmlNode):
+        return sum(1 for _ in document.element.iter())
+    return len(document.find_all(True))
+
+
+def measure(run, repeat):
+    """Best seconds per run, peak traced bytes and the result of one call of run"""
+    best = float('inf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, result
+
+
+def comparable(articles):
+    return [article.replace(scraped_at='') for article in articles]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1,10,50',
+                        help='comma-separated multipliers for the listing region of each fixture')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per case (best is reported)')
+    args = parser.parse_args()
+
+    mismatches = 0
+    print(f"{'case':40} {'backend':11} {'scale':>5} {'KiB':>6} {'full ms':>8} {'head ms':>8} {'cut ms':>7} "
+          f"{'elements':>15} {'peak KiB':>15}")
+    # The selector hints a first scan leaves behind, so the head is cut where later scans cut it
+    hints = WorkerHints()
+    for fixture, label, extract, head_of, parse in extraction_cases(hints):
+        with open(os.path.join(FIXTURES, fixture), 'rb') as f:
+            page = f.read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            extract(parse_html(page))
+
+        for scale in [int(s) for s in args.scales.split(',')]:
+            content = scale_document(page, scale)
+            for backend in html_parsing.BACKENDS:
+                html_parsing.set_backend(backend)
+                full_time, full_peak, full_articles = measure(
+                    lambda: extract(parse_html(content)), args.repeat)
+                head_time, head_peak, head_articles = measure(lambda: parse(content), args.repeat)
+                cut_time = measure(lambda: head_of(content), args.repeat)[0]
+                full_elements = element_count(parse_html(content))
+                head_elements = element_count(parse_html(head_of(content)))
+
+                same = comparable(full_articles) == comparable(head_articles)
+                mismatches += not same
+                print(f"{label:40} {backend:11} {scale:5} {len(content) // 1024:6} "
+                      f"{full_time * 1000:8.2f} {head_time * 1000:8.2f} {cut_time * 1000:7.2f} "
+                      f"{full_elements:7}/{head_elements:<7} "
+                      f"{full_peak // 1024:7}/{head_peak // 1024:<7}"
+                      f"{'' if same else '  MISMATCH'}")
+
+    if mismatches:
+        print(f"\n{mismatches} case(s) extracted different articles from the head than the whole page")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
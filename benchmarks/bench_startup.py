@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Benchmark
+Measures the import time of every CLI entry point with `python -X importtime`,
+checks it against a budget, and checks that --check and --dry-run never load
+the HTTP or parsing stack.
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, python arguments, import budget in ms, modules that must not load)
+HEAVY = ('requests', 'urllib3', 'bs4', 'soupsieve', 'lxml', 'xml.etree')
+CASES = [
+    ('scraper.py --check', ['scraper.py', '--check'], 40, HEAVY),
+    ('scraper.py --dry-run', ['scraper.py', '--dry-run'], 40, HEAVY),
+    ('scraper.py search', ['scraper.py', 'search', 'agents'], 40, HEAVY),
+    ('import scraper', ['-c', 'import scraper'], 40, HEAVY),
+    ('import google_ai_scraper', ['-c', 'import google_ai_scraper'], 40, HEAVY),
+    ('import openai_rss_scraper', ['-c', 'import openai_rss_scraper'], 40, HEAVY),
+    ('import openai_scraper', ['-c', 'import openai_scraper'], 40, HEAVY),
+]
+
+
+def import_times(args):
+    """({top-level module: cumulative microseconds}, every module loaded) for one run"""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stdout}{result.stderr}")
+
+    times = {}
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that triggered them
+        if not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+        loaded.add(name.strip())
+    return times, loaded
+
+
+def measure(args, startup, repeat):
+    """(best import ms beyond interpreter startup, modules loaded) over repeat runs"""
+    best = float('inf')
+    loaded = set()
+    for _ in range(repeat):
+        times, loaded = import_times(args)
+        total = sum(us for name, us in times.items() if name not in startup)
+        best = min(best, total / 1000)
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case (best is reported)')
+    args = parser.parse_args()
+
+    # Whatever the bare interpreter imports (site, encodings, ...) isn't ours
+    startup = import_times(['-c', 'pass'])[1]
+
+    failures = 0
+    print(f"{'entry point':28} {'ms':>8} {'budget':>8}  result")
+    for label, case_args, budget, forbidden in CASES:
+        elapsed, loaded = measure(case_args, startup, args.repeat)
+        heavy = sorted(name for name in loaded
+                       if any(name == f or name.startswith(f + '.') for f in forbidden))
+        problems = []
+        if elapsed > budget:
+            problems.append('over budget')
+        if heavy:
+            problems.append('loaded ' + ', '.join(sorted({name.split('.')[0] for name in heavy})))
+        failures += bool(problems)
+        print(f"{label:28} {elapsed:8.2f} {budget:8}  {'; '.join(problems) or 'ok'}")
+
+    if failures:
+        print(f"\n{failures} entry point(s) over their startup budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Scraper Benchmark Suite
+Replays the recorded fixtures for every competitor in config.json through
+its plugin, offline and at several page sizes. Times the
+fetch, parse, extract and report stages, measures peak memory, and appends
+one JSON line per case so runs can be compared over time.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 1,10,50] [--repeat N]
+                                           [--output PATH] [--record]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fetcher  # noqa: E402
+import html_parsing  # noqa: E402
+from benchmarks.offline import offline_session, record_fixtures  # noqa: E402
+from plugins import FeedPlugin, HtmlPlugin  # noqa: E402
+from scraper import CompetitorTracker  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'results.jsonl')
+
+
+class Case:
+    """One entry point over one recorded URL
+
+    parse turns the response body into a document the way entry does,
+    extract turns that document into articles (None for feeds, which parse
+    and extract in a single streaming pass), and entry runs the real scraper
+    end to end. Plugins the suite can't look into, such as custom entry
+    points, have neither parse nor extract and are only timed end to end.
+    """
+
+    def __init__(self, name, url, parse, extract, entry):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.extract = extract
+        self.entry = entry
+
+
+def build_cases(tracker):
+    """Benchmark cases for every competitor plugin in the tracker's config"""
+    return [plugin_case(plugin, tracker.context) for plugin in tracker.plugins]
+
+
+def plugin_case(plugin, ctx):
+    """The case for one configured source, following the path its plugin's scrape takes"""
+    cls = type(plugin)
+    name = f'{cls.__module__}.{cls.__name__}[{plugin.company}]'
+    if isinstance(plugin, FeedPlugin) and plugin.feeds:
+        return Case(name, plugin.feeds[0], lambda body: plugin.parse_feed(io.BytesIO(body), ctx), None,
+                    lambda: plugin.scrape(ctx))
+    if isinstance(plugin, HtmlPlugin):
+        # Listing pages are parsed from the head their plugin cuts, as in a scan
+        return Case(name, plugin.url,
+                    lambda body: html_parsing.parse_html(plugin.region(body, plugin.url, ctx)),
+                    lambda soup: plugin.extract(soup, plugin.url, ctx),
+                    lambda: plugin.scrape(ctx))
+    return Case(name, plugin.url, None, None, lambda: plugin.scrape(ctx))
+
+
+def best_of(repeat, func, *args):
+    """(best wall time in seconds, last result) of calling func repeatedly"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func, *args):
+    """Peak Python-heap allocation in KiB while running func once
+
+    tracemalloc only sees Python allocations, so lxml's C-level trees are
+    not counted.
+    """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(case, session, repeat):
+    """Time every stage of one case against the offline session"""
+    fetch_time, body = (best_of(repeat, lambda: session.get(case.url, timeout=10).content) if case.url
+                        else (0.0, b''))
+    total_time, entry_articles = best_of(repeat, case.entry)
+    if case.parse is None:
+        parse_time, extract_time, articles = 0.0, 0.0, entry_articles
+    else:
+        parse_time, document = best_of(repeat, case.parse, body)
+        extract_time, articles = (best_of(repeat, case.extract, document) if case.extract
+                                  else (0.0, document))
+
+    def parse_and_extract():
+        if case.parse is None:
+            return case.entry()
+        document = case.parse(body)
+        return case.extract(document) if case.extract else document
+
+    return {
+        'case': case.name,
+        'url': case.url,
+        'bytes': len(body),
+        'articles': len(articles),
+        'fetch_ms': fetch_time * 1000,
+        'parse_ms': parse_time * 1000,
+        'extract_ms': extract_time * 1000,
+        'total_ms': total_time * 1000,
+        'peak_kb': peak_memory(parse_and_extract),
+    }, entry_articles
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1,10,50',
+                        help='comma-separated listing size multipliers (default 1,10,50)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per stage (best is reported)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='JSON lines file to append to')
+    parser.add_argument('--record', action='store_true',
+                        help='refresh the fixtures from the live sites first')
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+
+    config_path = os.path.join(ROOT, 'config.json')
+    output = os.path.abspath(args.output)
+    run = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+    }
+
+    # Keep the caches and hint stores the scrapers create out of the repo
+    os.chdir(tempfile.mkdtemp(prefix='tracker-bench-'))
+
+    records = []
+    for scale in [int(s) for s in args.scales.split(',')]:
+        session = offline_session(scale)
+
+        tracker = CompetitorTracker(config_path)
+        tracker.session = session
+        tracker.fetcher = tracker.context.fetcher = fetcher.Fetcher(session)
+        fetcher.set_default_fetcher(tracker.fetcher)
+
+        all_articles = []
+        for case in build_cases(tracker):
+            record, articles = run_case(case, session, args.repeat)
+            record.update(run, scale=scale, backend=html_parsing.get_backend())
+            records.append(record)
+            all_articles.extend(article if article.company else article.replace(company=case.name)
+                                for article in articles)
+
+        report_time, _ = best_of(args.repeat, tracker.generate_report, all_articles)
+        records.append(dict(run, scale=scale, backend=html_parsing.get_backend(),
+                            case='scraper.generate_report', articles=len(all_articles),
+                            report_ms=report_time * 1000,
+                            peak_kb=peak_memory(tracker.generate_report, all_articles)))
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+    print(f"{'case':48} {'scale':>5} {'KiB':>7} {'fetch':>7} {'parse':>8} {'extract':>8} "
+          f"{'total':>8} {'peak KiB':>9}")
+    for r in records:
+        if r['case'] == 'scraper.generate_report':
+            print(f"{r['case']:48} {r['scale']:5} {'':>7} {'':>7} {'':>8} {'':>8} "
+                  f"{r['report_ms']:8.2f} {r['peak_kb']:9.0f}")
+            continue
+        print(f"{r['case']:48} {r['scale']:5} {r['bytes'] / 1024:7.0f} {r['fetch_ms']:7.2f} "
+              f"{r['parse_ms']:8.2f} {r['extract_ms']:8.2f} {r['total_ms']:8.2f} {r['peak_kb']:9.0f}")
+    print(f"\nTimes in ms. Results appended to {output}")
+
+
+if __name__ == '__main__':
+    main()
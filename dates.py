@@ -0,0 +1,111 @@
+"""
+Dates
+Turns the date strings scrapers find (RFC 822 pubDates, ISO 8601 datetime
+attributes, "September 1, 2025" page text) into UTC epoch seconds
+"""
+
+import calendar
+import re
+from datetime import datetime, timezone
+from functools import lru_cache
+
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS['sept'] = 9
+
+# Offsets in hours of the zone names RFC 822 allows
+ZONES = {'gmt': 0, 'ut': 0, 'utc': 0, 'z': 0, 'est': -5, 'edt': -4, 'cst': -6, 'cdt': -5,
+         'mst': -7, 'mdt': -6, 'pst': -8, 'pdt': -7}
+
+ISO_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+RFC822_RE = re.compile(
+    r'(?:[A-Za-z]{3},?\s*)?(\d{1,2})\s+([A-Za-z]{3,9})\.?\s+(\d{4})'
+    r'(?:\s+(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([A-Za-z]{1,3}|[+-]\d{2}:?\d{2}))?)?$')
+# "September 1, 2025", "Sep. 1 2025", "1 September 2025"
+MONTH_DAY_RE = re.compile(r'\b([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})\b')
+DAY_MONTH_RE = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})\b')
+NUMERIC_RE = re.compile(r'\b(\d{4})[/.](\d{1,2})[/.](\d{1,2})\b')
+
+
+def to_timestamp(text):
+    """UTC epoch seconds of a date string, or None if it can't be read
+
+    Dates without a time are midnight UTC, and times without a zone are UTC.
+    The common machine formats are parsed directly; anything else goes
+    through a memoized search of the text.
+    """
+    if not text:
+        return None
+    text = text.strip()
+
+    if ISO_RE.match(text):
+        stamp = parse_iso(text)
+        if stamp is not None:
+            return stamp
+
+    match = RFC822_RE.match(text)
+    if match:
+        stamp = parse_rfc822(match)
+        if stamp is not None:
+            return stamp
+
+    return parse_free_text(text)
+
+
+def parse_iso(text):
+    try:
+        parsed = datetime.fromisoformat(text[:-1] + '+00:00' if text.endswith(('Z', 'z')) else text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def parse_rfc822(match):
+    day, month, year, hour, minute, second, zone = match.groups()
+    month = MONTHS.get(month.lower())
+    if month is None:
+        return None
+
+    offset = 0
+    if zone:
+        if zone[0] in '+-':
+            digits = zone[1:].replace(':', '')
+            offset = (int(digits[:2]) * 3600 + int(digits[2:]) * 60) * (-1 if zone[0] == '-' else 1)
+        else:
+            offset = ZONES.get(zone.lower(), 0) * 3600
+    return from_fields(int(year), month, int(day), int(hour or 0), int(minute or 0),
+                       int(second or 0), offset)
+
+
+def from_fields(year, month, day, hour=0, minute=0, second=0, offset=0):
+    """Epoch seconds of a calendar date and time `offset` seconds east of UTC, or None if invalid"""
+    if not (1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+            and hour < 24 and minute < 60 and second < 62):
+        return None
+    return calendar.timegm((year, month, day, hour, minute, second)) - offset
+
+
+@lru_cache(maxsize=4096)
+def parse_free_text(text):
+    """Find a date anywhere in text ("Published September 1, 2025 by ...")"""
+    match = ISO_RE.search(text)
+    if match:
+        stamp = parse_iso(match.group())
+        if stamp is not None:
+            return stamp
+
+    match = MONTH_DAY_RE.search(text)
+    if match and match.group(1).lower() in MONTHS:
+        return from_fields(int(match.group(3)), MONTHS[match.group(1).lower()], int(match.group(2)))
+
+    match = DAY_MONTH_RE.search(text)
+    if match and match.group(2).lower() in MONTHS:
+        return from_fields(int(match.group(3)), MONTHS[match.group(2).lower()], int(match.group(1)))
+
+    match = NUMERIC_RE.search(text)
+    if match:
+        return from_fields(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    return None
+
@@ -0,0 +1,19 @@
+"""
+SQLite helpers
+Shared connection setup for the tracker's on-disk state
+"""
+
+import os
+import sqlite3
+
+
+def connect(path):
+    """Open a SQLite database that can be shared by the scan worker threads"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
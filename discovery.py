@@ -0,0 +1,200 @@
+"""
+Endpoint Discovery
+Remembers which endpoint produced articles for each source, and finds feeds
+advertised with <link rel="alternate"> when the known endpoints stop working
+"""
+
+import contextvars
+import threading
+import time
+from urllib.parse import urljoin
+
+import db
+import metrics
+from html_parsing import parse_html
+from settings import load_settings, state_path
+
+FEED_TYPES = {'application/rss+xml', 'application/atom+xml'}
+
+ENDPOINTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS endpoints (
+    source TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    found_at REAL NOT NULL
+);
+"""
+
+
+class EndpointCache:
+    """The endpoint that last produced articles for each source
+
+    Entries older than `max_age` seconds are ignored, so the full fallback
+    chain gets re-run now and then and can find a better endpoint.
+    """
+
+    def __init__(self, path, max_age=7 * 86400):
+        self.max_age = max_age
+        self.conn = db.connect(path)
+        self.conn.executescript(ENDPOINTS_SCHEMA)
+        self.lock = threading.Lock()
+        self.entries = {source: (kind, url, found_at) for source, kind, url, found_at
+                        in self.conn.execute('SELECT source, kind, url, found_at FROM endpoints')}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the endpoint cache configured in config.json settings"""
+        return cls(state_path(settings, 'endpoints.db'),
+                   settings.get('discovery_max_age_days', 7) * 86400)
+
+    def get(self, source):
+        """Return (kind, url) of the remembered endpoint, or None if unknown or stale"""
+        entry = self.entries.get(source)
+        if entry is None or time.time() - entry[2] > self.max_age:
+            return None
+        return entry[0], entry[1]
+
+    def record(self, source, kind, url):
+        with self.lock:
+            self.entries[source] = (kind, url, time.time())
+            self.conn.execute('INSERT OR REPLACE INTO endpoints VALUES (?, ?, ?, ?)',
+                              (source, kind, url, self.entries[source][2]))
+            self.conn.commit()
+
+    def forget(self, source):
+        with self.lock:
+            self.entries.pop(source, None)
+            self.conn.execute('DELETE FROM endpoints WHERE source = ?', (source,))
+            self.conn.commit()
+
+
+def feed_links(content, base_url):
+    """Absolute URLs of the RSS/Atom feeds an HTML page advertises"""
+    soup = parse_html(content)
+    feeds = []
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        if 'alternate' in rel and (link.get('type') or '').lower() in FEED_TYPES:
+            feeds.append(urljoin(base_url, link['href']))
+    return feeds
+
+
+def discover_feeds(pages, fetcher, headers=None):
+    """Fetch pages concurrently and return the feeds they advertise, in page order"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def links_on(page):
+        try:
+            return fetcher.fetch(page, lambda content: feed_links(content, page),
+                                 'discovery.feed_links', headers=headers)
+        except Exception as e:
+            print(f"Feed autodiscovery failed for {page}: {e}")
+            return []
+
+    if not pages:
+        return []
+    with ThreadPoolExecutor(max_workers=len(pages)) as pool:
+        found = pool.map(lambda page: contextvars.copy_context().run(links_on, page), pages)
+
+    feeds = []
+    for links in found:
+        feeds.extend(link for link in links if link not in feeds)
+    return feeds
+
+
+def run_chain(source, candidates, attempts, fetcher, discover_from=(), headers=None, endpoints=None):
+    """Return articles from the first endpoint that produces any
+
+    candidates is the fallback chain as (kind, url) pairs and attempts maps
+    each kind to a function taking a URL and returning articles. The endpoint
+    that worked last time is tried first; the full chain only runs when it
+    fails or has gone stale. Once the first candidate fails, feeds advertised
+    on the discover_from pages are looked up in the background and tried
+    after the last 'feed' candidate.
+    """
+    endpoints = endpoints or default_endpoints()
+
+    known = endpoints.get(source)
+    if known:
+        kind, url = known
+        articles = attempt_endpoint(attempts[kind], url)
+        if articles:
+            metrics.count('discovery', result='cached')
+            return articles
+        print(f"Remembered endpoint {url} stopped working, re-running discovery...")
+        endpoints.forget(source)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    metrics.count('discovery', result='fallback')
+    chain = [candidate for candidate in candidates if candidate != known]
+    last_feed = max((i for i, (kind, _) in enumerate(chain) if kind == 'feed'), default=-1)
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    discovered = None
+    try:
+        for i, (kind, url) in enumerate(chain):
+            articles = attempt_endpoint(attempts[kind], url)
+            if articles:
+                endpoints.record(source, kind, url)
+                return articles
+
+            # Once the first choice has failed, look for advertised feeds
+            # while the rest of the chain is probed
+            if discovered is None:
+                discovered = pool.submit(contextvars.copy_context().run,
+                                         discover_feeds, list(discover_from), fetcher, headers)
+
+            if i == last_feed:
+                articles = try_discovered(source, discovered.result(), chain, attempts, endpoints)
+                if articles:
+                    return articles
+
+        if last_feed < 0:
+            feeds = discovered.result() if discovered else discover_feeds(list(discover_from), fetcher, headers)
+            return try_discovered(source, feeds, chain, attempts, endpoints)
+        return []
+    finally:
+        # Don't hold up an early success waiting for autodiscovery to finish
+        pool.shutdown(wait=False)
+
+
+def try_discovered(source, feeds, chain, attempts, endpoints):
+    """Try autodiscovered feeds that are not already part of the chain"""
+    for url in feeds:
+        if ('feed', url) in chain:
+            continue
+        print(f"Trying autodiscovered feed: {url}")
+        articles = attempt_endpoint(attempts['feed'], url)
+        if articles:
+            endpoints.record(source, 'feed', url)
+            return articles
+    return []
+
+
+def attempt_endpoint(attempt, url):
+    """Run one attempt, treating errors like an endpoint with no articles"""
+    try:
+        return attempt(url)
+    except Exception as e:
+        print(f"Failed {url}: {e}")
+        return []
+
+
+_default_endpoints = None
+
+
+def default_endpoints():
+    """Endpoint cache shared by the standalone scrapers"""
+    global _default_endpoints
+    if _default_endpoints is None:
+        _default_endpoints = EndpointCache.from_settings(load_settings())
+    return _default_endpoints
+
+
+def set_default_endpoints(endpoints):
+    """Make the standalone scrapers remember endpoints in endpoints, e.g. the tracker's cache"""
+    global _default_endpoints
+    _default_endpoints = endpoints
@@ -0,0 +1,292 @@
+"""
+Distributed Scan
+Coordinator and workers that split one scan across processes or hosts
+
+The coordinator shards the configured sources over the workers by
+consistent hashing of each source's host, so every request to a host comes
+from one worker and its rate limits hold. Work and results pass through a
+queue (SQLite by default); the coordinator collects the workers' articles
+and writes a single report.
+"""
+
+import bisect
+import hashlib
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import article
+import db
+import metrics
+from plugins import import_object
+from settings import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scan TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    source TEXT NOT NULL,
+    batch INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_worker ON tasks (worker, result);
+CREATE INDEX IF NOT EXISTS tasks_scan ON tasks (scan);
+"""
+
+# Tasks are only handed out for the newest scan, and only from its lowest
+# unfinished batch, so batches run in order across all the workers
+CLAIMABLE = """
+worker = ? AND result IS NULL AND scan = (SELECT MAX(scan) FROM tasks)
+AND batch = (SELECT MIN(batch) FROM tasks
+             WHERE result IS NULL AND scan = (SELECT MAX(scan) FROM tasks))
+"""
+
+QUEUE_BACKENDS = {}
+
+
+def queue_backend(name):
+    """Class decorator adding a queue backend to the registry"""
+    def decorator(cls):
+        QUEUE_BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def open_queue(settings):
+    """The queue named by settings.queue_backend: a registered name or "module:Class" """
+    name = settings.get('queue_backend', 'sqlite')
+    cls = QUEUE_BACKENDS[name] if name in QUEUE_BACKENDS else import_object(name)
+    return cls.from_settings(settings)
+
+
+@queue_backend('sqlite')
+class SqliteQueue:
+    """Scan tasks and their results in one SQLite file shared by every process on a machine
+
+    Another backend only needs from_settings() and the six methods below.
+    A task claimed longer than `lease` seconds ago without a result is handed
+    out again, so a worker that dies mid-scan loses nothing once restarted.
+
+    One coordinator uses a queue at a time: queuing a scan drops every task
+    of earlier scans, so a coordinator that died leaves nothing for the
+    workers to pick up on later runs.
+    """
+
+    def __init__(self, path):
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('queue_path') or state_path(settings, 'queue.db'))
+
+    def put(self, scan, tasks):
+        """Queue (worker, source, batch) tasks for scan in place of any earlier scan's"""
+        with self.lock:
+            self.conn.execute('DELETE FROM tasks WHERE scan != ?', (scan,))
+            self.conn.executemany('INSERT INTO tasks (scan, worker, source, batch) VALUES (?, ?, ?, ?)',
+                                  [(scan, worker, source, batch) for worker, source, batch in tasks])
+            self.conn.commit()
+
+    def claim(self, worker, limit, lease=600):
+        """Up to limit unfinished (task id, source) pairs for worker from the current batch"""
+        now = time.time()
+        with self.lock:
+            # Take the write lock before reading so two processes can't claim the same task
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                tasks = self.conn.execute(
+                    f'SELECT id, source FROM tasks WHERE {CLAIMABLE} '
+                    'AND (claimed_at IS NULL OR claimed_at < ?) ORDER BY id LIMIT ?',
+                    (worker, now - lease, limit)).fetchall()
+                self.conn.executemany('UPDATE tasks SET claimed_at = ? WHERE id = ?',
+                                      [(now, task_id) for task_id, _ in tasks])
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return tasks
+
+    def pending(self, worker):
+        """Number of worker's unfinished tasks in the current scan, claimed or not"""
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM tasks WHERE worker = ? AND result IS NULL '
+            'AND scan = (SELECT MAX(scan) FROM tasks)', (worker,)).fetchone()[0]
+
+    def complete(self, task_id, articles):
+        """Record the articles a task found"""
+        with self.lock:
+            self.conn.execute('UPDATE tasks SET result = ? WHERE id = ?',
+                              (article.dumps(articles), task_id))
+            self.conn.commit()
+
+    def take_results(self, scan):
+        """{source: articles} of scan's finished tasks, removed from the queue"""
+        with self.lock:
+            rows = self.conn.execute('SELECT id, source, result FROM tasks '
+                                     'WHERE scan = ? AND result IS NOT NULL', (scan,)).fetchall()
+            self.conn.executemany('DELETE FROM tasks WHERE id = ?', [(task_id,) for task_id, _, _ in rows])
+            self.conn.commit()
+        return {source: article.loads(result) for _, source, result in rows}
+
+    def cancel(self, scan):
+        """Drop scan's unfinished tasks"""
+        with self.lock:
+            self.conn.execute('DELETE FROM tasks WHERE scan = ?', (scan,))
+            self.conn.commit()
+
+
+def ring_hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring: adding or removing a node only moves the keys on its share of the ring"""
+
+    def __init__(self, nodes, replicas=100):
+        points = sorted((ring_hash(f'{node}#{i}'), node) for node in nodes for i in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        return self.nodes[bisect.bisect(self.hashes, ring_hash(key)) % len(self.nodes)]
+
+
+def worker_names(settings):
+    """Names of the workers a scan is sharded over, from settings.scan_workers"""
+    return [f'worker-{i}' for i in range(max(1, settings.get('scan_workers', 2)))]
+
+
+def shard_key(plugin, rate_limits=()):
+    """What decides a source's worker: the rate-limit bucket of its host, or its name if it has no URL"""
+    from rate_limiter import domain_key
+
+    host = urlsplit(plugin.url).hostname if plugin.url else None
+    return domain_key(host, rate_limits) if host else plugin.company
+
+
+class Coordinator:
+    """Queues one task per source for the worker owning its host and collects the results"""
+
+    def __init__(self, plugins, queue, workers, rate_limits=(), timeout=3600, poll_interval=1.0):
+        self.plugins = plugins
+        self.queue = queue
+        self.ring = HashRing(workers)
+        self.rate_limits = rate_limits
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def from_settings(cls, plugins, settings):
+        return cls(plugins, open_queue(settings), worker_names(settings),
+                   settings.get('rate_limits', {}), settings.get('coordinator_timeout', 3600))
+
+    def assignments(self):
+        """{worker: [plugin, ...]} for the configured sources"""
+        shards = {}
+        for plugin in self.plugins:
+            shards.setdefault(self.ring.node_for(shard_key(plugin, self.rate_limits)), []).append(plugin)
+        return shards
+
+    def submit(self):
+        """Queue a new scan and return its id"""
+        scan = datetime.now().strftime('%Y%m%dT%H%M%S.%f')
+        self.queue.put(scan, [(worker, plugin.company, plugin.batch)
+                              for worker, plugins in self.assignments().items() for plugin in plugins])
+        return scan
+
+    def results(self, scan):
+        """Yield (plugin, articles) in config order as the workers finish them
+
+        Sources still unfinished after `timeout` seconds are cancelled and
+        yielded with no articles.
+        """
+        deadline = time.monotonic() + self.timeout
+        received = {}
+        pending = list(self.plugins)
+        while pending:
+            received.update(self.queue.take_results(scan))
+            while pending and pending[0].company in received:
+                plugin = pending.pop(0)
+                yield plugin, received.pop(plugin.company)
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                self.queue.cancel(scan)
+                print(f"Timed out waiting for {', '.join(plugin.company for plugin in pending)}")
+                for plugin in pending:
+                    yield plugin, []
+                break
+            time.sleep(self.poll_interval)
+
+
+class Worker:
+    """Scrapes the queued sources assigned to one worker name
+
+    Up to `concurrency` sources are scraped at once through the tracker, so
+    its session, rate limits and parse pool work as in a local scan.
+    """
+
+    def __init__(self, tracker, queue, name, concurrency=8, lease=600, poll_interval=1.0):
+        self.tracker = tracker
+        self.queue = queue
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.plugins = {plugin.company: plugin for plugin in tracker.plugins}
+
+    @classmethod
+    def from_settings(cls, tracker, settings, name):
+        return cls(tracker, open_queue(settings), name, settings.get('max_workers', 8),
+                   settings.get('worker_lease', 600))
+
+    def scrape(self, task):
+        task_id, source = task
+        plugin = self.plugins.get(source)
+        if plugin is None:
+            print(f"{self.name}: {source} is not in this worker's config")
+            articles = []
+        else:
+            articles = self.tracker.scrape_competitor(plugin)
+        self.queue.complete(task_id, articles)
+        return len(articles)
+
+    def run(self, stop=None, exit_when_idle=False):
+        """Claim and scrape tasks until stop is set, or until none are left with exit_when_idle
+
+        A worker whose next tasks are in a later batch waits for the other
+        workers to finish the current one.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        stop = stop or threading.Event()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not stop.is_set():
+                tasks = self.queue.claim(self.name, self.concurrency, self.lease)
+                if tasks:
+                    found = sum(executor.map(self.scrape, tasks))
+                    print(f"{self.name} finished {len(tasks)} source(s), {found} articles")
+                elif exit_when_idle and not self.queue.pending(self.name):
+                    break
+                else:
+                    stop.wait(self.poll_interval)
+
+
+def work(tracker, name, exit_when_idle=False):
+    """Run a Worker for tracker until SIGINT or SIGTERM"""
+    import signal
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    try:
+        Worker.from_settings(tracker, tracker.config['settings'], name).run(stop, exit_when_idle)
+    finally:
+        tracker.parse_pool.close()
+        metrics.flush()
+    print(f"{name} stopped")
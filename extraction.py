@@ -0,0 +1,207 @@
+"""
+Extraction Plans
+Precompiled selector chains for pulling articles out of listing pages
+"""
+
+import threading
+
+import db
+import metrics
+from html_parsing import LxmlNode, compile_selector, get_backend, listing_head
+from settings import load_settings, state_path
+
+
+class FieldRule:
+    """Selectors for one article field in priority order, plus an optional filter
+
+    accept(element) can reject a match so the next selector gets its turn,
+    e.g. descriptions that are too short to be useful.
+    """
+
+    def __init__(self, selectors, accept=None):
+        self.selectors = list(selectors)
+        self.accept = accept
+        self._patterns = None
+
+    @property
+    def patterns(self):
+        """soupsieve patterns for the BeautifulSoup backends, compiled on first use"""
+        if self._patterns is None:
+            import soupsieve
+            self._patterns = [soupsieve.compile(selector) for selector in self.selectors]
+        return self._patterns
+
+
+class ExtractionPlan:
+    """Container selectors and field rules for one family of listing pages
+
+    Selectors are compiled once, the first time a page needs them. Fields are
+    matched in a single walk over each article subtree instead of one
+    select_one() call per selector per field.
+    """
+
+    def __init__(self, name, containers, **fields):
+        self.name = name
+        self.containers = list(containers)
+        self.fields = {field: rule if isinstance(rule, FieldRule) else FieldRule(rule)
+                       for field, rule in fields.items()}
+
+    def container_order(self, site=None, hints=None):
+        """Container selectors in the order they are tried: the one that won for site last time first"""
+        preferred = hints.get(site, self.name) if hints and site else None
+        if preferred in self.containers:
+            return preferred, [preferred] + [selector for selector in self.containers
+                                             if selector != preferred]
+        return preferred, self.containers
+
+    def head(self, content, limit, site=None, hints=None):
+        """The start of a listing page that holds the articles select_containers would pick
+
+        Whenever the first selector tried has `limit` matches in the head,
+        it wins on the head exactly as on the whole page.
+        """
+        return listing_head(content, self.container_order(site, hints)[1][0], limit)
+
+    def variant(self, limit):
+        """What extracting a head depends on besides its markup: the plan, the limit and the parser backend"""
+        return f"{self.name}:{'|'.join(self.containers)}:{limit}:{get_backend()}"
+
+    def select_containers(self, soup, site=None, hints=None):
+        """Return (selector, elements) for the first container selector that matches
+
+        The selector that won for this site last time is tried first.
+        """
+        preferred, order = self.container_order(site, hints)
+        for selector in order:
+            with metrics.stage('select'):
+                elements = soup.select(selector)
+            if elements:
+                if hints and site and selector != preferred:
+                    hints.record(site, self.name, selector)
+                return selector, elements
+        return None, []
+
+    def match_fields(self, element):
+        """Return {field: best matching descendant or None} for one article element"""
+        with metrics.stage('select'):
+            return self.walk_fields(element)
+
+    def walk_fields(self, element):
+        """match_fields without instrumentation"""
+        if isinstance(element, LxmlNode):
+            return {field: self.match_lxml(element, rule) for field, rule in self.fields.items()}
+
+        from bs4 import Tag
+
+        # First match of every selector, found in one pass over the subtree
+        firsts = {field: [None] * len(rule.patterns) for field, rule in self.fields.items()}
+        pending = sum(len(rule.patterns) for rule in self.fields.values())
+
+        for node in element.descendants:
+            if not isinstance(node, Tag):
+                continue
+            for field, rule in self.fields.items():
+                slots = firsts[field]
+                for i, pattern in enumerate(rule.patterns):
+                    if slots[i] is None and pattern.match(node):
+                        slots[i] = node
+                        pending -= 1
+            if not pending:
+                break
+
+        return {field: self.pick(rule, firsts[field]) for field, rule in self.fields.items()}
+
+    def match_lxml(self, element, rule):
+        """Field match on the lxml fast path, using compiled XPath per selector"""
+        for selector in rule.selectors:
+            found = compile_selector(selector)(element.element)
+            if found:
+                node = LxmlNode(found[0])
+                if rule.accept is None or rule.accept(node):
+                    return node
+        return None
+
+    @staticmethod
+    def pick(rule, candidates):
+        """Highest-priority candidate that passes the rule's filter"""
+        for node in candidates:
+            if node is not None and (rule.accept is None or rule.accept(node)):
+                return node
+        return None
+
+
+HINTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS selector_hints (
+    site TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    PRIMARY KEY (site, plan)
+);
+"""
+
+
+class SelectorHints:
+    """Remembers which container selector produced articles for each site"""
+
+    def __init__(self, path):
+        self.conn = db.connect(path)
+        self.conn.executescript(HINTS_SCHEMA)
+        self.lock = threading.Lock()
+        self.hints = {(site, plan): selector for site, plan, selector
+                      in self.conn.execute('SELECT site, plan, selector FROM selector_hints')}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the hint store configured in config.json settings"""
+        return cls(state_path(settings, 'selector_hints.db'))
+
+    def get(self, site, plan):
+        return self.hints.get((site, plan))
+
+    def record(self, site, plan, selector):
+        with self.lock:
+            self.hints[(site, plan)] = selector
+            self.conn.execute('INSERT OR REPLACE INTO selector_hints VALUES (?, ?, ?)',
+                              (site, plan, selector))
+            self.conn.commit()
+
+    def snapshot(self, site):
+        """This site's hints as a plain dict that can be sent to a parse worker"""
+        return {key: selector for key, selector in self.hints.items() if key[0] == site}
+
+
+class WorkerHints:
+    """Stand-in for SelectorHints inside a parse worker process
+
+    Starts from a snapshot of the parent's hints and collects what the plans
+    record, so the parent can persist it once the articles come back.
+    """
+
+    def __init__(self, snapshot=None):
+        self.hints = dict(snapshot or {})
+        self.recorded = {}
+
+    def get(self, site, plan):
+        return self.hints.get((site, plan))
+
+    def record(self, site, plan, selector):
+        self.hints[(site, plan)] = selector
+        self.recorded[(site, plan)] = selector
+
+
+_default_hints = None
+
+
+def default_hints():
+    """Selector hints shared by the standalone scrapers"""
+    global _default_hints
+    if _default_hints is None:
+        _default_hints = SelectorHints.from_settings(load_settings())
+    return _default_hints
+
+
+def set_default_hints(hints):
+    """Make the standalone scrapers use hints, e.g. the tracker's selector hints"""
+    global _default_hints
+    _default_hints = hints
+
@@ -0,0 +1,248 @@
+"""
+Fetcher
+Common GET path used by the tracker and the standalone scrapers
+"""
+
+import time
+
+import metrics
+from fingerprints import FingerprintStore, fingerprint
+from http_cache import HttpCache
+from retry import RETRY_STATUSES, CircuitBreaker, RetryPolicy
+from settings import load_settings
+
+
+# Scrapers only parse markup; anything else (images, PDFs, JSON errors) is refused
+PARSEABLE_TYPES = ('html', 'xml')
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseRejected(IOError):
+    """A response the fetcher stopped reading: too large, or not HTML or XML"""
+
+
+class CappedStream:
+    """File-like response body that raises ResponseRejected once more than max_bytes are read"""
+
+    def __init__(self, raw, max_bytes, url):
+        self.raw = raw
+        self.max_bytes = max_bytes
+        self.url = url
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(CHUNK_SIZE), b''))
+        data = self.raw.read(size)
+        self.read_bytes += len(data)
+        if self.read_bytes > self.max_bytes:
+            metrics.count('rejected', reason='size')
+            raise ResponseRejected(f"{self.url}: body larger than {self.max_bytes} bytes")
+        return data
+
+    def tell(self):
+        return self.raw.tell()
+
+
+class Fetcher:
+    """Issues conditional GETs and hands response bodies to a parse callback
+
+    Bodies are always streamed: a response that isn't HTML or XML is dropped
+    after its headers, and one that grows past max_bytes is dropped as soon
+    as it does, so one runaway page can't hold the scan's memory or time.
+    """
+
+    def __init__(self, session=None, cache=None, breaker=None, retry=None, timeout=10,
+                 max_bytes=5 * 1024 * 1024, fingerprints=None):
+        self.session = session
+        self.cache = cache
+        self.fingerprints = fingerprints
+        self.breaker = breaker
+        self.retry = retry or RetryPolicy(retries=0)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_settings(cls, settings, session=None):
+        """Fetcher with the caches, retry policy and circuit breaker from config.json"""
+        return cls(session,
+                   cache=HttpCache.from_settings(settings),
+                   fingerprints=FingerprintStore.from_settings(settings),
+                   breaker=CircuitBreaker.from_settings(settings),
+                   retry=RetryPolicy.from_settings(settings),
+                   timeout=settings.get('timeout', 10),
+                   max_bytes=int(settings.get('max_response_mb', 5) * 1024 * 1024))
+
+    def get(self, url, **kwargs):
+        """Plain GET through the session if there is one"""
+        if self.session is not None:
+            return self.session.get(url, **kwargs)
+
+        import requests
+        return requests.get(url, **kwargs)
+
+    def request(self, url, **kwargs):
+        """GET with circuit breaking, an adaptive timeout and retries with backoff"""
+        import requests
+
+        if self.breaker is not None:
+            self.breaker.check(url)
+            kwargs.setdefault('timeout', self.breaker.timeout_for(url))
+        else:
+            kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            try:
+                response = self.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt < self.retry.retries:
+                    time.sleep(self.retry.delay(attempt))
+                    attempt += 1
+                    continue
+                if self.breaker is not None:
+                    self.breaker.record_failure(url)
+                raise
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retry.retries:
+                delay = self.retry.delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            if self.breaker is not None:
+                if response.status_code >= 400:
+                    self.breaker.record_failure(url)
+                else:
+                    self.breaker.record_success(url, response_latency(response))
+            return response
+
+    def fetch(self, url, parse, cache_key, headers=None, stream=False, max_bytes=None,
+              region=None, variant='', max_age=None, **kwargs):
+        """GET url and return parse(body), reusing the cached result on a 304
+
+        cache_key names what parse produces, so two scrapers reading the same
+        URL never see each other's results; None skips the caches. With
+        stream=True, parse receives a file-like body instead of bytes and may
+        stop reading early. max_bytes overrides the fetcher's size cap.
+
+        A downloaded body is cut to region(body), the part parse needs (the
+        whole body by default), and parse receives only that. The region is
+        fingerprinted together with variant, and if both match the last parse
+        of this URL within max_age seconds that result is reused.
+        """
+        cache = self.cache if cache_key is not None else None
+        max_bytes = max_bytes or self.max_bytes
+        headers = dict(headers or {})
+        entry = cache.lookup(url, cache_key) if cache else None
+        if entry is not None:
+            headers.update(entry.validators())
+
+        response = self.request(url, headers=headers, stream=True, **kwargs)
+        metrics.observe('request', response_latency(response), url=url)
+        metrics.count('responses', status=response.status_code)
+        try:
+            if cache is not None:
+                cache_result = 'miss' if entry is None else 'hit' if response.status_code == 304 else 'stale'
+                metrics.count('cache_lookups', result=cache_result)
+
+            if response.status_code == 304 and entry is not None:
+                return entry.payload
+            response.raise_for_status()
+            check_response(response, url, max_bytes)
+
+            if stream:
+                response.raw.decode_content = True
+                with metrics.stage('process', url=url):
+                    result = parse(CappedStream(response.raw, max_bytes, url))
+            else:
+                with metrics.stage('download', url=url):
+                    body = read_body(response, max_bytes, url)
+                if region is not None:
+                    with metrics.stage('head', url=url):
+                        body = region(body)
+                result = self.parse_unless_unchanged(url, parse, cache_key, body, variant, max_age)
+
+            if metrics.enabled():
+                metrics.count('bytes', response.raw.tell() if hasattr(response.raw, 'tell') else 0)
+        finally:
+            response.close()
+
+        if cache is not None:
+            cache.store(url, cache_key, response, result)
+        return result
+
+    def parse_unless_unchanged(self, url, parse, cache_key, body, variant='', max_age=None):
+        """parse(body), or what it returned last time if body and variant are unchanged"""
+        if self.fingerprints is None or cache_key is None:
+            with metrics.stage('process', url=url):
+                return parse(body)
+
+        with metrics.stage('fingerprint', url=url):
+            digest = fingerprint(body, variant)
+            result = self.fingerprints.lookup(url, cache_key, digest)
+        metrics.count('fingerprint_lookups', result='miss' if result is None else 'hit')
+        if result is not None:
+            return result
+
+        with metrics.stage('process', url=url):
+            result = parse(body)
+        self.fingerprints.store(url, cache_key, digest, result, max_age)
+        return result
+
+
+def check_response(response, url, max_bytes):
+    """Raise ResponseRejected for a body that isn't markup or says it is over max_bytes"""
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and not any(kind in content_type for kind in PARSEABLE_TYPES):
+        metrics.count('rejected', reason='content_type')
+        raise ResponseRejected(f"{url}: not HTML or XML ({content_type})")
+
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        metrics.count('rejected', reason='size')
+        raise ResponseRejected(f"{url}: body of {length} bytes is over {max_bytes}")
+
+
+def read_body(response, max_bytes, url):
+    """The decoded body, read in chunks and abandoned as soon as it passes max_bytes"""
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            metrics.count('rejected', reason='size')
+            raise ResponseRejected(f"{url}: body larger than {max_bytes} bytes")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def response_latency(response):
+    """Seconds until the response headers arrived, not counting rate-limit waits"""
+    waited = getattr(response.request, 'throttle_wait', 0) if response.request is not None else 0
+    return max(response.elapsed.total_seconds() - waited, 0)
+
+
+_default_fetcher = None
+
+
+def default_fetcher():
+    """Fetcher shared by the standalone scrapers, configured from config.json
+
+    It holds one pooled session, so every probe a scraper makes reuses the
+    connections the earlier ones opened.
+    """
+    from transport import build_session
+
+    global _default_fetcher
+    if _default_fetcher is None:
+        settings = load_settings()
+        _default_fetcher = Fetcher.from_settings(settings, build_session(settings))
+    return _default_fetcher
+
+
+def set_default_fetcher(fetcher):
+    """Make the standalone scrapers fetch through fetcher, e.g. the tracker's session"""
+    global _default_fetcher
+    _default_fetcher = fetcher
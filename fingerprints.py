@@ -0,0 +1,89 @@
+"""
+Fingerprints
+Hashes of the listing region of each fetched page, so a page whose listing
+hasn't changed since the last run reuses the articles extracted from it then,
+even when the site sends no ETag or Last-Modified
+"""
+
+import hashlib
+import re
+import threading
+import time
+
+import article
+import db
+from settings import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    payload TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (url, cache_key)
+);
+"""
+
+# Markup that changes on every request (nonces, inline state, build ids) but
+# never reaches an extracted article
+NOISE_RE = re.compile(rb'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->|<noscript\b.*?</noscript\s*>',
+                      re.S | re.I)
+SPACE_RE = re.compile(rb'\s+')
+
+
+def fingerprint(region, variant=''):
+    """Hash of a page region, ignoring scripts, styles, comments and runs of whitespace
+
+    variant names how the region is read (see ExtractionPlan.variant), so the
+    same region extracted another way hashes differently.
+    """
+    if isinstance(region, str):
+        region = region.encode('utf-8')
+    normalized = SPACE_RE.sub(b' ', NOISE_RE.sub(b'', region))
+    digest = hashlib.blake2b(variant.encode('utf-8') + b'\0', digest_size=16)
+    digest.update(normalized)
+    return digest.digest()
+
+
+class FingerprintStore:
+    """The fingerprint and extracted articles of each URL's last parse
+
+    Entries are keyed like HttpCache entries. Each one expires `max_age`
+    seconds after it was extracted, or after its source's own max age, so a
+    changed extractor or config reaches unchanged pages within that time.
+    """
+
+    def __init__(self, path, max_age=7 * 86400):
+        self.max_age = max_age
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the store configured in config.json settings, or None if disabled"""
+        max_age_days = settings.get('fingerprint_max_age_days', 7)
+        if not max_age_days:
+            return None
+        return cls(state_path(settings, 'fingerprints.db'), max_age_days * 86400)
+
+    def lookup(self, url, cache_key, digest):
+        """Articles last extracted from url if its region still hashes to digest, else None"""
+        row = self.conn.execute(
+            'SELECT fingerprint, payload, expires FROM fingerprints WHERE url = ? AND cache_key = ?',
+            (url, cache_key)).fetchone()
+        if row is None or row[0] != digest or row[2] < time.time():
+            return None
+        payload = row[1]
+        return article.unpack(payload) if isinstance(payload, bytes) else article.loads(payload)
+
+    def store(self, url, cache_key, digest, payload, max_age=None):
+        """Remember what was extracted from a region with this digest"""
+        now = time.time()
+        data = article.pack(payload) or article.dumps(payload)
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)',
+                              (url, cache_key, digest, data, now + (max_age or self.max_age)))
+            self.conn.execute('DELETE FROM fingerprints WHERE expires < ?', (now,))
+            self.conn.commit()
@@ -4,246 +4,175 @@ Google AI Blog Scraper
 Gets the latest blog posts from Google's AI blog
 """
 
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import json
-import xml.etree.ElementTree as ET
+import metrics
+from article import Article, batch_timestamp
+from article_store import save_posts
+from discovery import run_chain
+from extraction import ExtractionPlan, FieldRule, default_hints
+from feed_parser import feed_articles
+from fetcher import default_fetcher
+from html_parsing import parse_html
+from parse_pool import default_parse_pool
+from settings import load_settings
+
+RSS_URLS = [
+    "https://blog.google/technology/ai/rss/",
+    "https://ai.googleblog.com/feeds/posts/default",
+    "https://blog.google/rss/"
+]
+
+PAGE_URLS = [
+    "https://blog.google/technology/ai/",
+    "https://ai.googleblog.com/",
+    "https://research.google/blog/"
+]
+
+# Posts kept from a listing page
+MAX_POSTS = 10
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5'
+}
 
 def scrape_google_ai_blog():
     """Scrape Google AI blog for latest posts"""
-
-    # Try RSS feed first
-    rss_urls = [
-        "https://blog.google/technology/ai/rss/",
-        "https://ai.googleblog.com/feeds/posts/default",
-        "https://blog.google/rss/"
-    ]
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
-    }
-
-    # Try RSS feeds first
-    for rss_url in rss_urls:
-        try:
-            print(f"Trying RSS feed: {rss_url}")
-            response = requests.get(rss_url, headers=headers, timeout=10)
-
-            if response.status_code == 200:
-                print(f"Success! Found RSS feed at {rss_url}")
-                result = parse_rss_feed(response.content, rss_url)
-                if result and len([p for p in result if p['title'] != 'No title']) > 0:
-                    return result
-                else:
-                    print(f"RSS feed found but parsing failed, trying next...")
-
-        except Exception as e:
-            print(f"Failed RSS feed {rss_url}: {e}")
-            continue
-
-    # If RSS fails, try direct scraping
-    print("RSS feeds failed, trying direct scraping...")
-    return scrape_google_ai_direct()
-
-def parse_rss_feed(content, source_url):
-    """Parse RSS feed content"""
-    try:
-        articles = []
-
-        # Handle different XML namespaces
-        try:
-            root = ET.fromstring(content)
-        except ET.ParseError as e:
-            print(f"XML parsing error: {e}")
-            return []
-
-        # Look for items in different RSS formats
-        items = (root.findall('.//item') or
-                root.findall('.//{http://purl.org/rss/1.0/}item') or
-                root.findall('.//{http://www.w3.org/2005/Atom}entry'))
-
-        for item in items[:10]:  # Get first 10
+    # RSS feeds first, then direct scraping; the endpoint that worked last
+    # run is tried before any of them
+    candidates = [('feed', url) for url in RSS_URLS] + [('page', url) for url in PAGE_URLS]
+    return run_chain('google_ai_scraper', candidates,
+                     {'feed': try_rss_feed, 'page': scrape_google_ai_page},
+                     default_fetcher(), discover_from=PAGE_URLS, headers=HEADERS)
+
+def try_rss_feed(rss_url):
+    """Fetch one RSS feed and return its articles"""
+    print(f"Trying RSS feed: {rss_url}")
+    result = default_fetcher().fetch(rss_url, lambda stream: parse_rss_feed(stream, rss_url),
+                                     'google_ai_scraper.rss', headers=HEADERS, stream=True)
+
+    print(f"Success! Found RSS feed at {rss_url}")
+    if not result:
+        print(f"RSS feed found but parsing failed, trying next...")
+    return result
+
+def parse_rss_feed(stream, source_url):
+    """Parse a streamed RSS or Atom feed"""
+    return feed_articles(stream, limit=10,  # Get first 10
+                         source='Google AI RSS', scraped_at=batch_timestamp())
+
+def scrape_google_ai_page(url):
+    """Direct scraping of one Google AI blog page"""
+    print(f"Trying direct scraping: {url}")
+    articles = default_fetcher().fetch(
+        url, lambda head: default_parse_pool().parse(parse_google_ai_head, head, url,
+                                                     site=url, hints=default_hints()),
+        'google_ai_scraper.direct', headers=HEADERS,
+        region=lambda content: DIRECT_PLAN.head(content, MAX_POSTS, url, default_hints()),
+        variant=DIRECT_PLAN.variant(MAX_POSTS))
+    print(f"Success! Scraping {url}")
+    return articles
+
+def parse_google_ai_page(content, url, hints=None):
+    """Parse a Google AI blog listing page into articles"""
+    if hints is None:
+        hints = default_hints()
+    return parse_google_ai_head(DIRECT_PLAN.head(content, MAX_POSTS, url, hints), url, hints)
+
+def parse_google_ai_head(head, url, hints=None):
+    """Parse a head cut by DIRECT_PLAN.head into articles (may run in a parse worker)"""
+    return extract_google_ai_page(parse_html(head), url, hints)
+
+def extract_google_ai_page(soup, url, hints=None):
+    """Extract articles from a parsed Google AI listing page"""
+    articles = []
+    scraped_at = batch_timestamp()
+    if hints is None:
+        hints = default_hints()
+
+    # Look for different article patterns - more specific selectors first
+    selector, elements = DIRECT_PLAN.select_containers(soup, url, hints)
+    if elements:
+        print(f"Using selector: {selector} (found {len(elements)} elements)")
+
+        for element in elements[:MAX_POSTS]:
             try:
-                # Handle both RSS and Atom formats
-                title_elem = (item.find('title') or
-                            item.find('.//{http://www.w3.org/2005/Atom}title'))
-
-                link_elem = (item.find('link') or
-                           item.find('.//{http://www.w3.org/2005/Atom}link'))
-
-                desc_elem = (item.find('description') or
-                           item.find('.//{http://www.w3.org/2005/Atom}summary') or
-                           item.find('.//{http://www.w3.org/2005/Atom}content'))
-
-                date_elem = (item.find('pubDate') or
-                           item.find('.//{http://www.w3.org/2005/Atom}published') or
-                           item.find('.//{http://www.w3.org/2005/Atom}updated'))
-
-                # Extract data
-                title = title_elem.text if title_elem is not None else 'No title'
-
-                # Handle link extraction
-                link = ''
-                if link_elem is not None:
-                    if link_elem.text:
-                        link = link_elem.text
-                    elif link_elem.get('href'):  # Atom format
-                        link = link_elem.get('href')
-
-                description = desc_elem.text if desc_elem is not None else ''
-                date = date_elem.text if date_elem is not None else ''
-
-                # Clean up description (remove HTML tags if present)
-                if description:
-                    soup = BeautifulSoup(description, 'html.parser')
-                    description = soup.get_text().strip()
-                    if len(description) > 300:
-                        description = description[:300] + "..."
-
-                article = {
-                    'title': title.strip(),
-                    'link': link.strip(),
-                    'description': description,
-                    'date': date,
-                    'source': 'Google AI RSS',
-                    'scraped_at': datetime.now().isoformat()
-                }
-
-                articles.append(article)
+                fields = DIRECT_PLAN.match_fields(element)
+
+                # Extract title
+                title = extract_title(element, fields['title'])
+
+                # Extract link
+                link = extract_link(element, fields['link'], url)
+
+                # Extract date
+                date = extract_date(fields['date'])
+
+                # Extract description/excerpt
+                description = extract_description(fields['description'])
+
+                if title and len(title) > 5:  # Filter out very short titles
+                    articles.append(Article(title, link or url, description=description, date=date,
+                                            source=f'Google AI Direct ({url})',
+                                            scraped_at=scraped_at))
 
             except Exception as e:
-                print(f"Error parsing RSS item: {e}")
+                print(f"Error processing element: {e}")
                 continue
 
-        return articles
-
-    except Exception as e:
-        print(f"Error parsing RSS feed: {e}")
-        return []
-
-def scrape_google_ai_direct():
-    """Direct scraping of Google AI blog pages"""
-    urls_to_try = [
-        "https://blog.google/technology/ai/",
-        "https://ai.googleblog.com/",
-        "https://research.google/blog/"
-    ]
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5'
-    }
-
-    for url in urls_to_try:
-        try:
-            print(f"Trying direct scraping: {url}")
-            response = requests.get(url, headers=headers, timeout=15)
-
-            if response.status_code == 200:
-                print(f"Success! Scraping {url}")
-
-                soup = BeautifulSoup(response.content, 'html.parser')
-                articles = []
-
-                # Look for different article patterns - more specific selectors first
-                article_selectors = [
-                    'article h2 a',
-                    'article h3 a',
-                    '.blog-post a',
-                    '.post-title a',
-                    'h2 a[href*="/technology/ai/"]',
-                    'h3 a[href*="/technology/ai/"]',
-                    'a[href*="/technology/ai/"]:not([href*="twitter"]):not([href*="facebook"]):not([href*="linkedin"])',
-                    'a[href*="googleblog.com"]:not([href*="twitter"]):not([href*="facebook"]):not([href*="linkedin"])'
-                ]
-
-                for selector in article_selectors:
-                    elements = soup.select(selector)
-                    if elements and len(elements) >= 1:  # Found a promising selector
-                        print(f"Using selector: {selector} (found {len(elements)} elements)")
-
-                        for element in elements[:10]:
-                            try:
-                                # Extract title
-                                title = extract_title(element)
-
-                                # Extract link
-                                link = extract_link(element, url)
-
-                                # Extract date
-                                date = extract_date(element)
-
-                                # Extract description/excerpt
-                                description = extract_description(element)
-
-                                if title and len(title) > 5:  # Filter out very short titles
-                                    article = {
-                                        'title': title,
-                                        'link': link or url,
-                                        'description': description,
-                                        'date': date,
-                                        'source': f'Google AI Direct ({url})',
-                                        'scraped_at': datetime.now().isoformat()
-                                    }
-                                    articles.append(article)
-
-                            except Exception as e:
-                                print(f"Error processing element: {e}")
-                                continue
-
-                        if articles:
-                            return articles
-                        break
-
-                # If no articles found with selectors, try finding any AI-related links
-                if not articles:
-                    print("No articles found with selectors, trying AI-related links...")
-                    ai_links = soup.find_all('a', href=True)
-
-                    for link_elem in ai_links[:20]:
-                        href = link_elem.get('href', '')
-                        text = link_elem.get_text().strip()
-
-                        # Look for AI-related content
-                        if (('ai' in href.lower() or 'artificial' in text.lower() or
-                             'machine learning' in text.lower() or 'ml' in text.lower()) and
-                            len(text) > 10 and len(text) < 200):
-
-                            if not href.startswith('http'):
-                                if href.startswith('/'):
-                                    href = f"https://blog.google{href}"
-                                else:
-                                    href = f"{url.rstrip('/')}/{href}"
-
-                            articles.append({
-                                'title': text,
-                                'link': href,
-                                'description': '',
-                                'date': '',
-                                'source': f'Google AI Links ({url})',
-                                'scraped_at': datetime.now().isoformat()
-                            })
-
-                    return articles[:10]  # Return first 10
-
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            continue
-
-    return []
-
-def extract_title(element):
+        if articles:
+            return articles
+
+    # If no articles found with selectors, try finding any AI-related links
+    if not articles:
+        print("No articles found with selectors, trying AI-related links...")
+        ai_links = soup.find_all('a', href=True)
+
+        for link_elem in ai_links[:20]:
+            href = link_elem.get('href', '')
+            text = link_elem.get_text().strip()
+
+            # Look for AI-related content
+            if (('ai' in href.lower() or 'artificial' in text.lower() or
+                 'machine learning' in text.lower() or 'ml' in text.lower()) and
+                len(text) > 10 and len(text) < 200):
+
+                if not href.startswith('http'):
+                    if href.startswith('/'):
+                        href = f"https://blog.google{href}"
+                    else:
+                        href = f"{url.rstrip('/')}/{href}"
+
+                articles.append(Article(text, href, source=f'Google AI Links ({url})',
+                                        scraped_at=scraped_at))
+
+    return articles[:10]  # Return first 10
+
+def substantial_text(element):
+    """Only accept descriptions long enough to be useful"""
+    return len(element.get_text().strip()) > 20
+
+# Direct-scrape layout; selectors are compiled once at import
+DIRECT_PLAN = ExtractionPlan(
+    'google_ai_direct',
+    ['article h2 a',
+     'article h3 a',
+     '.blog-post a',
+     '.post-title a',
+     'h2 a[href*="/technology/ai/"]',
+     'h3 a[href*="/technology/ai/"]',
+     'a[href*="/technology/ai/"]:not([href*="twitter"]):not([href*="facebook"]):not([href*="linkedin"])',
+     'a[href*="googleblog.com"]:not([href*="twitter"]):not([href*="facebook"]):not([href*="linkedin"])'],
+    title=['h1', 'h2', 'h3', 'h4', '.title', '[class*="title"]', '[class*="headline"]'],
+    link=['a'],
+    date=['time', '.date', '[class*="date"]', '[datetime]', '[class*="publish"]'],
+    description=FieldRule(['.excerpt', '.description', '.summary', 'p'], accept=substantial_text),
+)
+
+def extract_title(element, title_elem):
     """Extract title from element"""
-    title_selectors = ['h1', 'h2', 'h3', 'h4', '.title', '[class*="title"]', '[class*="headline"]']
-
-    for selector in title_selectors:
-        title_elem = element.select_one(selector)
-        if title_elem:
-            return title_elem.get_text().strip()
+    if title_elem:
+        return title_elem.get_text().strip()
 
     # If no title found and element is a link, use link text
     if element.name == 'a':
@@ -251,16 +180,14 @@ def extract_title(element):
 
     return None
 
-def extract_link(element, base_url):
+def extract_link(element, link_elem, base_url):
     """Extract link from element"""
     if element.name == 'a' and element.get('href'):
         href = element['href']
+    elif link_elem and link_elem.get('href'):
+        href = link_elem['href']
     else:
-        link_elem = element.select_one('a')
-        if link_elem and link_elem.get('href'):
-            href = link_elem['href']
-        else:
-            return None
+        return None
 
     # Make link absolute
     if href and not href.startswith('http'):
@@ -274,27 +201,18 @@ def extract_link(element, base_url):
 
     return href
 
-def extract_date(element):
-    """Extract date from element"""
-    date_selectors = ['time', '.date', '[class*="date"]', '[datetime]', '[class*="publish"]']
-
-    for selector in date_selectors:
-        date_elem = element.select_one(selector)
-        if date_elem:
-            return date_elem.get('datetime') or date_elem.get_text().strip()
+def extract_date(date_elem):
+    """Extract date from the matched date element"""
+    if date_elem:
+        return date_elem.get('datetime') or date_elem.get_text().strip()
 
     return None
 
-def extract_description(element):
-    """Extract description from element"""
-    desc_selectors = ['.excerpt', '.description', '.summary', 'p']
-
-    for selector in desc_selectors:
-        desc_elem = element.select_one(selector)
-        if desc_elem:
-            desc = desc_elem.get_text().strip()
-            if len(desc) > 20:  # Only return substantial descriptions
-                return desc[:300] + "..." if len(desc) > 300 else desc
+def extract_description(desc_elem):
+    """Extract description from the matched description element"""
+    if desc_elem:
+        desc = desc_elem.get_text().strip()
+        return desc[:300] + "..." if len(desc) > 300 else desc
 
     return None
 
@@ -305,33 +223,31 @@ def display_posts(posts):
     print(f"{'='*60}")
 
     for i, post in enumerate(posts, 1):
-        print(f"\n{i}. {post['title']}")
-        print(f"   Link: {post['link']}")
-        if post.get('date'):
-            print(f"   Date: {post['date']}")
-        if post.get('description'):
-            print(f"   Description: {post['description']}")
-        print(f"   Source: {post['source']}")
+        print(f"\n{i}. {post.title}")
+        print(f"   Link: {post.link}")
+        if post.date:
+            print(f"   Date: {post.date}")
+        if post.description:
+            print(f"   Description: {post.description}")
+        print(f"   Source: {post.source}")
         print("-" * 60)
 
-def save_posts_json(posts, filename="google_ai_posts.json"):
-    """Save posts to JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(posts, f, indent=2)
-    print(f"\nSaved {len(posts)} posts to {filename}")
-
 def main():
     """Main function"""
     print("Google AI Blog Scraper")
     print("=====================")
 
-    posts = scrape_google_ai_blog()
+    metrics.configure(load_settings())
+    with metrics.source('google_ai_scraper'), metrics.stage('scrape'):
+        posts = scrape_google_ai_blog()
 
     if posts:
         display_posts(posts)
-        save_posts_json(posts)
+        save_posts(posts, 'google_ai_scraper')
     else:
         print("No posts found or error occurred during scraping.")
 
+    metrics.flush()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+HTML Parsing
+Pluggable HTML parser backends behind the small BeautifulSoup API the scrapers use
+
+Backends:
+  html.parser  BeautifulSoup with the pure-Python standard library parser
+  lxml         BeautifulSoup with the lxml tree builder (the default)
+  lxml.html    raw lxml.html tree with compiled CSS selectors, wrapped in LxmlNode
+"""
+
+from functools import lru_cache
+
+import metrics
+from settings import load_settings
+
+BACKENDS = ('html.parser', 'lxml', 'lxml.html')
+DEFAULT_BACKEND = 'lxml'
+# Bytes of a listing page fed to the parser before the first check for enough articles
+HEAD_CHUNK = 16 * 1024
+
+_backend = None
+
+
+def set_backend(name):
+    """Select the parser backend used by parse_html"""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend {name!r}, expected one of {BACKENDS}")
+    _backend = name
+
+
+def get_backend():
+    """Return the active backend, reading settings.html_parser on first use"""
+    if _backend is None:
+        set_backend(load_settings().get('html_parser', DEFAULT_BACKEND))
+    return _backend
+
+
+def parse_html(content, backend=None):
+    """Parse an HTML document with the given (or active) backend"""
+    backend = backend or get_backend()
+    with metrics.stage('parse'):
+        if backend == 'lxml.html':
+            return LxmlNode.from_document(content)
+
+        # Imported here so runs that never parse (304s, --check) skip loading bs4
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(content, backend)
+
+
+def listing_head(content, selector, limit, chunk_size=HEAD_CHUNK):
+    """The start of a listing page, up to where its first `limit` selector matches end
+
+    The page goes through lxml's incremental parser in growing chunks until
+    those matches are complete, and is cut at a tag boundary just after.
+    Parsing the head builds the same first `limit` listing elements without
+    the rest of the page's DOM. Pages with fewer matches come back whole.
+    """
+    if not limit or len(content) <= chunk_size:
+        return content
+    from lxml import etree
+
+    find = compile_selector(selector)
+    parser = etree.HTMLPullParser(events=('start',), tag='html')
+    root = None
+    start, end = 0, chunk_size
+    while end < len(content):
+        parser.feed(content[start:end])
+        for _, root in parser.read_events():
+            pass
+
+        matches = find(root)[:limit] if root is not None else []
+        if len(matches) == limit and all(map(is_closed, matches)):
+            cut = content.rfind(b'<' if isinstance(content, bytes) else '<', 0, end)
+            metrics.count('partial_parses')
+            return content[:cut] if cut > 0 else content
+        # Doubling what is fed between checks keeps the searches linear in the page size
+        start, end = end, end * 2
+    return content
+
+
+def is_closed(element):
+    """Whether the incremental parser has moved past the end of element"""
+    if element.getnext() is not None:
+        return True
+    return any(ancestor.getnext() is not None for ancestor in element.iterancestors())
+
+
+@lru_cache(maxsize=None)
+def compile_selector(selector):
+    """Translate a CSS selector to a compiled XPath over an element's descendants"""
+    from cssselect import HTMLTranslator
+    from lxml import etree
+
+    # bs4's select() never matches the element itself, so skip descendant-or-self
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix='descendant::'))
+
+
+class LxmlNode:
+    """Thin wrapper giving an lxml.html element the BeautifulSoup calls we rely on"""
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    @classmethod
+    def from_document(cls, content):
+        """Parse a full document, treating an empty one as an empty <html>"""
+        import lxml.html
+        from lxml.etree import ParserError
+
+        try:
+            return cls(lxml.html.document_fromstring(content))
+        except ParserError:
+            return cls(lxml.html.Element('html'))
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, LxmlNode) and self.element is other.element
+
+    def __hash__(self):
+        return id(self.element)
+
+    @property
+    def name(self):
+        return self.element.tag
+
+    def get(self, attr, default=None):
+        return self.element.get(attr, default)
+
+    def __getitem__(self, attr):
+        value = self.element.get(attr)
+        if value is None:
+            raise KeyError(attr)
+        return value
+
+    def get_text(self):
+        return self.element.text_content()
+
+    def select(self, selector):
+        return [LxmlNode(el) for el in compile_selector(selector)(self.element)]
+
+    def select_one(self, selector):
+        matches = compile_selector(selector)(self.element)
+        return LxmlNode(matches[0]) if matches else None
+
+    def find_parent(self):
+        parent = self.element.getparent()
+        return LxmlNode(parent) if parent is not None else None
+
+    def find(self, name=None, **attrs):
+        matches = self.find_all(name, limit=1, **attrs)
+        return matches[0] if matches else None
+
+    def find_all(self, name=None, limit=None, **attrs):
+        """Descendants by tag name and attribute filters (True, a string or a callable)"""
+        results = []
+        for el in self.element.iterdescendants(name) if name else self.element.iterdescendants():
+            if not isinstance(el.tag, str):
+                continue  # comments and processing instructions
+            if all(attr_matches(el.get(attr), expected) for attr, expected in attrs.items()):
+                results.append(LxmlNode(el))
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+
+def attr_matches(value, expected):
+    """Apply a BeautifulSoup-style attribute filter to one attribute value"""
+    if expected is True:
+        return value is not None
+    if callable(expected):
+        return bool(expected(value))
+    return value == expected
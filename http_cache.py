@@ -0,0 +1,115 @@
+"""
+HTTP Cache
+On-disk conditional-request cache (ETag / Last-Modified) shared by all scrapers
+"""
+
+import threading
+import time
+
+import article
+import db
+from settings import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (url, cache_key)
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class CacheEntry:
+    """Validators and parsed result of one earlier response"""
+
+    def __init__(self, etag, last_modified, payload):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.payload = payload
+
+    def validators(self):
+        """Request headers that make the next GET conditional"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Size-bounded LRU store of response validators and parsed results
+
+    Entries are keyed by URL and by a caller-chosen cache_key, because the
+    same feed is parsed into different shapes by different scrapers. Only
+    parsed results are kept, so a 304 skips both the download and parsing.
+    They are stored with msgpack when it is installed and as JSON otherwise.
+    """
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build the cache from config.json settings, or None if disabled"""
+        max_mb = settings.get('http_cache_max_mb', 50)
+        if not max_mb:
+            return None
+        return cls(state_path(settings, 'http_cache.db'), int(max_mb * 1024 * 1024))
+
+    def lookup(self, url, cache_key):
+        """Return the CacheEntry for url, marking it recently used"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified, payload FROM responses WHERE url = ? AND cache_key = ?',
+                (url, cache_key)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                'UPDATE responses SET last_used = ? WHERE url = ? AND cache_key = ?',
+                (time.time(), url, cache_key))
+            self.conn.commit()
+
+        etag, last_modified, payload = row
+        if isinstance(payload, bytes):
+            return CacheEntry(etag, last_modified, article.unpack(payload))
+        return CacheEntry(etag, last_modified, article.loads(payload))
+
+    def store(self, url, cache_key, response, payload):
+        """Remember the validators of response together with its parsed payload"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        data = article.pack(payload) or article.dumps(payload)
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, cache_key, etag, last_modified, data, len(data), time.time()))
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute(
+            'SELECT url, cache_key, size FROM responses ORDER BY last_used').fetchall()
+        for url, cache_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self.conn.execute(
+                'DELETE FROM responses WHERE url = ? AND cache_key = ?', (url, cache_key))
+            total -= size
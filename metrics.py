@@ -0,0 +1,177 @@
+"""
+Metrics
+Optional per-source, per-stage instrumentation for the scrapers
+
+Instrumentation is off unless settings.metrics_path is set. While it is off,
+every call here is a single check of a module global, and stage() hands back
+a shared no-op context manager.
+
+Stages recorded by the scrapers:
+  scrape    whole scrape of one competitor
+  throttle  waiting on the per-host rate limiter
+  dns       name lookups that missed the DNS cache
+  connect   opening a new connection: TCP connect plus TLS handshake
+  request   GET until response headers arrive: DNS, connect, TLS and server time
+  download  reading the response body
+  head      cutting the listing region parse needs out of the body
+  fingerprint  hashing the listing region and looking up the last parse of it
+  parse     building the HTML document
+  select    running extraction-plan selectors
+  process   the parse callback as a whole (parse + select + field cleanup)
+
+Pages handed to parse worker processes only record `process`, which then
+includes the round trip to the worker; set parse_workers to 0 to see parse
+and select separately.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+_source = contextvars.ContextVar('metrics_source', default='')
+_recorder = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class Recorder:
+    """Collects stage timings and counters until they are flushed"""
+
+    def __init__(self, path, fmt='jsonl'):
+        self.path = path
+        self.format = fmt
+        self.lock = threading.Lock()
+        self.events = []
+        self.stage_totals = defaultdict(lambda: [0.0, 0])
+        self.counters = defaultdict(float)
+
+    def observe(self, stage, seconds, **labels):
+        source = _source.get()
+        with self.lock:
+            totals = self.stage_totals[(source, stage)]
+            totals[0] += seconds
+            totals[1] += 1
+            self.events.append({'ts': time.time(), 'source': source, 'stage': stage,
+                                'seconds': round(seconds, 6), **labels})
+
+    def count(self, metric, value=1, **labels):
+        key = (metric, _source.get(), tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+            self.events.append({'ts': time.time(), 'source': key[1], 'metric': metric,
+                                'value': value, **labels})
+
+    def flush(self):
+        """Write what was recorded in the configured format"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.lock:
+            if self.format == 'prometheus':
+                # The textfile collector expects a complete snapshot, so replace atomically
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(self.prometheus_text())
+                os.replace(tmp_path, self.path)
+            else:
+                with open(self.path, 'a') as f:
+                    for event in self.events:
+                        f.write(json.dumps(event) + '\n')
+            self.events = []
+
+    def prometheus_text(self):
+        """Aggregated metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP tracker_stage_seconds Time spent per scrape stage',
+            '# TYPE tracker_stage_seconds summary',
+        ]
+        for (source, stage), (seconds, count) in sorted(self.stage_totals.items()):
+            labels = f'source="{escape(source)}",stage="{stage}"'
+            lines.append(f'tracker_stage_seconds_sum{{{labels}}} {seconds:.6f}')
+            lines.append(f'tracker_stage_seconds_count{{{labels}}} {count}')
+
+        seen = set()
+        for (metric, source, labels), value in sorted(self.counters.items()):
+            name = f'tracker_{metric}_total'
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {name} counter')
+            label_text = ','.join([f'source="{escape(source)}"'] +
+                                  [f'{k}="{escape(str(v))}"' for k, v in labels])
+            lines.append(f'{name}{{{label_text}}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class StageTimer:
+    """Context manager that records the time spent in one stage"""
+
+    __slots__ = ('recorder', 'stage', 'labels', 'start')
+
+    def __init__(self, recorder, stage, labels):
+        self.recorder = recorder
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.observe(self.stage, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def configure(settings):
+    """Turn instrumentation on when settings.metrics_path is set"""
+    global _recorder
+    path = settings.get('metrics_path')
+    _recorder = Recorder(path, settings.get('metrics_format', 'jsonl')) if path else None
+    return _recorder is not None
+
+
+def enabled():
+    """True when instrumentation is on"""
+    return _recorder is not None
+
+
+def stage(name, **labels):
+    """Time a block as one stage of the current source's scrape"""
+    if _recorder is None:
+        return _NULL_STAGE
+    return StageTimer(_recorder, name, labels)
+
+
+def observe(name, seconds, **labels):
+    """Record a stage duration measured elsewhere"""
+    if _recorder is not None:
+        _recorder.observe(name, seconds, **labels)
+
+
+def count(metric, value=1, **labels):
+    """Add to a counter such as bytes, responses or cache lookups"""
+    if _recorder is not None:
+        _recorder.count(metric, value, **labels)
+
+
+@contextlib.contextmanager
+def source(name):
+    """Attribute everything recorded in this block (and thread) to one source"""
+    token = _source.set(name)
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def flush():
+    """Write recorded metrics to settings.metrics_path"""
+    if _recorder is not None:
+        _recorder.flush()
@@ -0,0 +1,159 @@
+"""
+Near-Duplicate Index
+MinHash signatures of every reported article's title and description, banded
+for LSH lookup, so the same announcement posted on several sites is reported once
+"""
+
+import hashlib
+import re
+import struct
+import threading
+
+import db
+import metrics
+from article_store import article_key
+from settings import state_path
+
+# 16 bands of 4 rows: pairs at 0.7 Jaccard similarity share a band 99% of
+# the time, pairs at 0.3 only 12%, and every candidate is then verified
+BANDS = 16
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+SHINGLE = 4
+DEFAULT_SIMILARITY = 0.7
+
+# Too few words and boilerplate link text ("Read more about it") would match
+# across unrelated articles
+MIN_WORDS = 4
+
+# Each permutation XORs the 64-bit shingle hashes with a fixed mask, which
+# runs in C through map() and is several times faster than a*h+b mod p.
+# The masks never change so signatures stored by earlier scans stay comparable
+MASKS = [int.from_bytes(hashlib.blake2b(b'%d' % i, digest_size=8).digest(), 'big')
+         for i in range(PERMUTATIONS)]
+
+SIGNATURE = struct.Struct(f'>{PERMUTATIONS}I')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    key TEXT PRIMARY KEY,
+    signature BLOB,
+    canonical TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, value);
+"""
+
+WORD_RE = re.compile(r'\w+')
+
+
+def shingles(text):
+    """Hashes of the character 4-grams of text with punctuation and case removed"""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+    text = ' '.join(words)
+    return {int.from_bytes(hashlib.blake2b(text[i:i + SHINGLE].encode('utf-8'), digest_size=8).digest(),
+                           'big')
+            for i in range(len(text) - SHINGLE + 1)}
+
+
+def minhash(text):
+    """MinHash signature of text (a tuple of PERMUTATIONS ints), or None if it is too short"""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return tuple(min(map(mask.__xor__, hashes)) >> 32 for mask in MASKS)
+
+
+def band_values(signature):
+    """(band, value) pairs a signature is filed under"""
+    packed = SIGNATURE.pack(*signature)
+    values = []
+    for band in range(BANDS):
+        rows = packed[band * ROWS * 4:(band + 1) * ROWS * 4]
+        values.append((band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(),
+                                            'big', signed=True)))
+    return values
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / PERMUTATIONS
+
+
+class NearDuplicateIndex:
+    """Persistent MinHash LSH index over every article the tracker has reported
+
+    An article is checked against history by looking up only the signatures
+    that share one of its bands, never by comparing it with every article.
+    The first copy of a story is its canonical article; later copies at least
+    `threshold` similar point at it, and keep doing so on later scans.
+    """
+
+    def __init__(self, path, threshold=DEFAULT_SIMILARITY):
+        self.threshold = threshold
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the index configured in config.json settings"""
+        return cls(state_path(settings, 'near_duplicates.db'),
+                   settings.get('near_duplicate_similarity', DEFAULT_SIMILARITY))
+
+    def canonical(self, article, key):
+        """Key of the article this one duplicates, or key if it is the first copy"""
+        row = self.conn.execute('SELECT canonical FROM signatures WHERE key = ?', (key,)).fetchone()
+        if row:
+            return row[0]
+
+        signature = minhash(f'{article.title} {article.description}')
+        if signature is None:
+            self.conn.execute('INSERT INTO signatures VALUES (?, NULL, ?)', (key, key))
+            return key
+
+        bands = band_values(signature)
+        canonical = self.nearest(signature, bands) or key
+        self.conn.execute('INSERT INTO signatures VALUES (?, ?, ?)',
+                          (key, SIGNATURE.pack(*signature), canonical))
+        if canonical == key:
+            # Only canonical articles are matched against, so clusters don't drift
+            self.conn.executemany('INSERT INTO bands VALUES (?, ?, ?)',
+                                  [(band, value, key) for band, value in bands])
+        return canonical
+
+    def nearest(self, signature, bands):
+        """Key of the most similar canonical article at or above the threshold, if any"""
+        if not self.threshold:
+            return None
+
+        where = ' OR '.join(['(b.band = ? AND b.value = ?)'] * len(bands))
+        rows = self.conn.execute(
+            f'SELECT DISTINCT s.key, s.signature FROM bands b JOIN signatures s ON s.key = b.key '
+            f'WHERE {where}', [part for pair in bands for part in pair])
+
+        best = None
+        for key, stored in rows:
+            score = similarity(signature, SIGNATURE.unpack(stored))
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, key)
+        return best[1] if best else None
+
+    def filter(self, articles):
+        """Articles that aren't near-duplicates of one reported before them"""
+        unique = []
+        with self.lock:
+            for article in articles:
+                key = article_key(article)
+                if self.canonical(article, key) == key:
+                    unique.append(article)
+                else:
+                    metrics.count('near_duplicate')
+            self.conn.commit()
+        return unique
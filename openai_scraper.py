@@ -4,14 +4,31 @@ Simple OpenAI Blog Scraper
 Gets the latest blog posts from OpenAI's website
 """
 
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-import json
+import metrics
+from article import Article, batch_timestamp
+from article_store import save_posts
+from extraction import ExtractionPlan, default_hints
+from fetcher import default_fetcher
+from html_parsing import parse_html
+from settings import load_settings
+
+BLOG_URL = "https://openai.com/blog"
+
+# Blog post containers, most specific first; fields are matched by hand below
+POST_PLAN = ExtractionPlan('openai_blog', [
+    'article',
+    '[data-testid*="post"]',
+    '.blog-post',
+    '.post-item',
+    'a[href*="/blog/"]'
+])
+
+# Posts kept from the listing
+MAX_POSTS = 10
 
 def scrape_openai_blog():
     """Scrape OpenAI blog for latest posts"""
-    url = "https://openai.com/blog"
+    url = BLOG_URL
 
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -24,105 +41,101 @@ def scrape_openai_blog():
 
     try:
         print(f"Fetching {url}...")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find blog post articles
-        articles = []
-
-        # Look for article elements or blog post containers
-        post_selectors = [
-            'article',
-            '[data-testid*="post"]',
-            '.blog-post',
-            '.post-item',
-            'a[href*="/blog/"]'
-        ]
-
-        blog_posts = []
-
-        # Try different selectors to find blog posts
-        for selector in post_selectors:
-            elements = soup.select(selector)
-            if elements:
-                print(f"Found {len(elements)} elements with selector: {selector}")
-                blog_posts = elements
-                break
-
-        # If no specific selectors work, look for links containing /blog/
-        if not blog_posts:
-            blog_posts = soup.find_all('a', href=lambda x: x and '/blog/' in x and x != '/blog')
-
-        print(f"Processing {len(blog_posts)} blog posts...")
-
-        for post in blog_posts[:10]:  # Get first 10 posts
-            try:
-                # Extract title
-                title = None
-                title_selectors = ['h1', 'h2', 'h3', 'h4', '.title', '[class*="title"]']
-
-                for title_sel in title_selectors:
-                    title_elem = post.find(title_sel)
-                    if title_elem:
-                        title = title_elem.get_text().strip()
-                        break
-
-                # If no title found in post, use the link text
-                if not title and post.name == 'a':
-                    title = post.get_text().strip()
-
-                # Extract link
-                link = None
-                if post.name == 'a' and post.get('href'):
-                    link = post['href']
-                else:
-                    link_elem = post.find('a')
-                    if link_elem and link_elem.get('href'):
-                        link = link_elem['href']
-
-                # Make link absolute if it's relative
-                if link and not link.startswith('http'):
-                    link = f"https://openai.com{link}"
-
-                # Extract date/time
-                date = None
-                date_selectors = ['time', '.date', '[class*="date"]', '[datetime]']
-                for date_sel in date_selectors:
-                    date_elem = post.find(date_sel)
-                    if date_elem:
-                        date = date_elem.get('datetime') or date_elem.get_text().strip()
-                        break
-
-                # Extract excerpt/description
-                excerpt = None
-                excerpt_selectors = ['.excerpt', '.description', 'p']
-                for exc_sel in excerpt_selectors:
-                    exc_elem = post.find(exc_sel)
-                    if exc_elem:
-                        excerpt = exc_elem.get_text().strip()[:200] + "..." if len(exc_elem.get_text().strip()) > 200 else exc_elem.get_text().strip()
-                        break
-
-                if title and link:
-                    articles.append({
-                        'title': title,
-                        'link': link,
-                        'date': date,
-                        'excerpt': excerpt,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-
-            except Exception as e:
-                print(f"Error processing post: {e}")
-                continue
-
-        return articles
+        return default_fetcher().fetch(
+            url, parse_openai_head, 'openai_scraper.blog', headers=headers,
+            region=lambda content: POST_PLAN.head(content, MAX_POSTS, BLOG_URL, default_hints()),
+            variant=POST_PLAN.variant(MAX_POSTS))
 
     except Exception as e:
         print(f"Error scraping OpenAI blog: {e}")
         return []
 
+def parse_openai_blog(content, hints=None):
+    """Parse the head of the OpenAI blog listing into posts"""
+    if hints is None:
+        hints = default_hints()
+    return parse_openai_head(POST_PLAN.head(content, MAX_POSTS, BLOG_URL, hints), hints)
+
+def parse_openai_head(head, hints=None):
+    """Parse a head cut by POST_PLAN.head into posts"""
+    return extract_openai_blog(parse_html(head), hints)
+
+def extract_openai_blog(soup, hints=None):
+    """Extract posts from a parsed OpenAI blog listing"""
+    # Find blog post articles
+    articles = []
+    scraped_at = batch_timestamp()
+    if hints is None:
+        hints = default_hints()
+
+    # Try different selectors to find blog posts, last run's winner first
+    selector, blog_posts = POST_PLAN.select_containers(soup, BLOG_URL, hints)
+    if blog_posts:
+        print(f"Found {len(blog_posts)} elements with selector: {selector}")
+
+    # If no specific selectors work, look for links containing /blog/
+    if not blog_posts:
+        blog_posts = soup.find_all('a', href=lambda x: x and '/blog/' in x and x != '/blog')
+
+    print(f"Processing {len(blog_posts)} blog posts...")
+
+    for post in blog_posts[:MAX_POSTS]:
+        try:
+            # Extract title
+            title = None
+            title_selectors = ['h1', 'h2', 'h3', 'h4', '.title', '[class*="title"]']
+
+            for title_sel in title_selectors:
+                title_elem = post.find(title_sel)
+                if title_elem:
+                    title = title_elem.get_text().strip()
+                    break
+
+            # If no title found in post, use the link text
+            if not title and post.name == 'a':
+                title = post.get_text().strip()
+
+            # Extract link
+            link = None
+            if post.name == 'a' and post.get('href'):
+                link = post['href']
+            else:
+                link_elem = post.find('a')
+                if link_elem and link_elem.get('href'):
+                    link = link_elem['href']
+
+            # Make link absolute if it's relative
+            if link and not link.startswith('http'):
+                link = f"https://openai.com{link}"
+
+            # Extract date/time
+            date = None
+            date_selectors = ['time', '.date', '[class*="date"]', '[datetime]']
+            for date_sel in date_selectors:
+                date_elem = post.find(date_sel)
+                if date_elem:
+                    date = date_elem.get('datetime') or date_elem.get_text().strip()
+                    break
+
+            # Extract excerpt/description
+            excerpt = None
+            excerpt_selectors = ['.excerpt', '.description', 'p']
+            for exc_sel in excerpt_selectors:
+                exc_elem = post.find(exc_sel)
+                if exc_elem:
+                    excerpt = exc_elem.get_text().strip()[:200] + "..." if len(exc_elem.get_text().strip()) > 200 else exc_elem.get_text().strip()
+                    break
+
+            if title and link:
+                articles.append(Article(title, link, date=date, description=excerpt,
+                                        scraped_at=scraped_at))
+
+        except Exception as e:
+            print(f"Error processing post: {e}")
+            continue
+
+    return articles
+
 def display_posts(posts):
     """Display posts in a readable format"""
     print(f"\n{'='*60}")
@@ -130,32 +143,30 @@ def display_posts(posts):
     print(f"{'='*60}")
 
     for i, post in enumerate(posts, 1):
-        print(f"\n{i}. {post['title']}")
-        print(f"   Link: {post['link']}")
-        if post['date']:
-            print(f"   Date: {post['date']}")
-        if post['excerpt']:
-            print(f"   Excerpt: {post['excerpt']}")
+        print(f"\n{i}. {post.title}")
+        print(f"   Link: {post.link}")
+        if post.date:
+            print(f"   Date: {post.date}")
+        if post.description:
+            print(f"   Excerpt: {post.description}")
         print("-" * 60)
 
-def save_posts_json(posts, filename="openai_posts.json"):
-    """Save posts to JSON file"""
-    with open(filename, 'w') as f:
-        json.dump(posts, f, indent=2)
-    print(f"\nSaved {len(posts)} posts to {filename}")
-
 def main():
     """Main function"""
     print("OpenAI Blog Scraper")
     print("==================")
 
-    posts = scrape_openai_blog()
+    metrics.configure(load_settings())
+    with metrics.source('openai_scraper'), metrics.stage('scrape'):
+        posts = scrape_openai_blog()
 
     if posts:
         display_posts(posts)
-        save_posts_json(posts)
+        save_posts(posts, 'openai_scraper')
     else:
         print("No posts found or error occurred during scraping.")
 
+    metrics.flush()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Parse Pool
+Process pool that parses downloaded pages off the network threads
+
+Scan threads download a page, hand the raw bytes to a worker process, and
+wait for the extracted articles. Parsing and selector matching are CPU-bound
+and would otherwise serialize on the GIL however many downloads run at once.
+"""
+
+import os
+import threading
+
+from extraction import WorkerHints
+from html_parsing import get_backend, set_backend
+
+
+def parse_in_worker(func, content, snapshot, args, backend):
+    """Worker side of ParsePool.parse: returns (articles, selector hints recorded)"""
+    # Each task carries the parent's backend, so set_backend() after the
+    # workers started still reaches them
+    set_backend(backend)
+    hints = WorkerHints(snapshot)
+    return func(content, *args, hints=hints), hints.recorded
+
+
+class ParsePool:
+    """Runs parse functions in worker processes, or inline with no workers
+
+    A parse function takes the response body and its own arguments, plus a
+    `hints` keyword for selector hints, and returns articles. It has to be a
+    module-level function so workers can import it, and everything it is
+    given or returns must be picklable.
+    """
+
+    def __init__(self, workers=None):
+        if workers is None:
+            # A single core gains nothing from a worker but the pickling
+            workers = os.cpu_count() or 1
+            workers = workers if workers > 1 else 0
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Pool sized by settings.parse_workers, defaulting to one worker per core"""
+        return cls(settings.get('parse_workers'))
+
+    def parse(self, func, content, *args, site=None, hints=None):
+        """Return func(content, *args, hints=...), run in a worker when the pool has any"""
+        if not self.workers:
+            return func(content, *args, hints=hints)
+
+        snapshot = hints.snapshot(site) if hints is not None and site else {}
+        articles, recorded = self.pool().submit(parse_in_worker, func, content, snapshot, args,
+                                                    get_backend()).result()
+        if hints is not None:
+            for (hint_site, plan), selector in recorded.items():
+                hints.record(hint_site, plan, selector)
+        return articles
+
+    def pool(self):
+        """Start the worker processes on first use"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = self.start()
+            return self.executor
+
+    def start(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Forking a process that has scan threads running can copy a held
+        # lock into the child, so start workers from a clean process
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def close(self):
+        """Stop the worker processes; the next parse starts new ones"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+
+_default_parse_pool = None
+
+
+def default_parse_pool():
+    """Pool shared by the standalone scrapers
+
+    They parse one page at a time, so by default it parses inline; the
+    tracker swaps in its process pool with set_default_parse_pool().
+    """
+    global _default_parse_pool
+    if _default_parse_pool is None:
+        _default_parse_pool = ParsePool(0)
+    return _default_parse_pool
+
+
+def set_default_parse_pool(pool):
+    global _default_parse_pool
+    _default_parse_pool = pool
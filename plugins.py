@@ -0,0 +1,315 @@
+"""
+Source Plugins
+The scrapers the tracker can run for a competitor, chosen per competitor in
+config.json
+
+Plugin types:
+  html    listing page scraped with the generic extraction plan (a bare URL)
+  feed    RSS/Atom feeds, with autodiscovery and the listing page as fallbacks
+  custom  any scraper function named by "entry": "module:function"
+
+A competitor entry is either a URL (an html plugin) or an object such as
+{"type": "feed", "url": "...", "feeds": ["..."]}. Custom entries and
+"module:Class" types are imported the first time they are used.
+"""
+
+import contextlib
+import importlib
+import importlib.util
+import threading
+from urllib.parse import urljoin
+
+from article import Article, as_article, batch_timestamp
+from dates import to_timestamp
+from discovery import run_chain
+from extraction import ExtractionPlan
+from feed_parser import feed_articles
+from html_parsing import parse_html
+from parse_pool import ParsePool
+
+# Listing layout the html plugin understands; selectors are compiled once at import
+GENERIC_PLAN = ExtractionPlan(
+    'generic',
+    ['article', '.blog-post', '.news-item', '.post', '[class*="article"]'],
+    title=['h1', 'h2', 'h3', '.title', '[class*="title"]'],
+    link=['a'],
+    date=['time', '.date', '[class*="date"]', '[datetime]'],
+)
+
+PLUGIN_TYPES = {}
+
+
+def register(name):
+    """Class decorator adding a plugin type to the registry"""
+    def decorator(cls):
+        PLUGIN_TYPES[name] = cls
+        cls.type_name = name
+        return cls
+    return decorator
+
+
+def import_object(path):
+    """Import "module:attribute" on demand"""
+    module_name, _, attribute = path.partition(':')
+    if not attribute:
+        raise ValueError(f"Expected 'module:name', got {path!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ScanContext:
+    """What plugins share during one scan"""
+
+    def __init__(self, fetcher, hints=None, endpoints=None, limit=5, pool=None):
+        self.fetcher = fetcher
+        self.hints = hints
+        self.endpoints = endpoints
+        self.limit = limit
+        self.pool = pool or ParsePool(0)
+
+
+class SourcePlugin:
+    """One competitor's scraper plus its scheduling and caching hints
+
+    Hints, all optional in the competitor's config entry:
+      concurrency  most sources sharing this plugin scraped at once
+      cache        false to bypass the HTTP cache for this source
+      batch        scan batch; lower batches finish before higher ones start
+      poll_interval  shortest time in seconds between polls in watch mode
+      max_bytes    largest response body read from this source
+      fingerprint_max_age_days  longest an unchanged listing's extraction is reused
+
+    cache, max_bytes and fingerprint_max_age_days only apply to html and feed
+    plugins; a custom plugin's function fetches on its own, so --check
+    reports them there.
+    """
+
+    type_name = None
+
+    def __init__(self, company, spec):
+        self.company = company
+        self.spec = spec
+        self.url = spec.get('url')
+        self.concurrency = spec.get('concurrency')
+        self.cache = spec.get('cache', True)
+        self.batch = spec.get('batch', 0)
+        self.poll_interval = spec.get('poll_interval')
+        self.max_bytes = spec.get('max_bytes')
+        max_age_days = spec.get('fingerprint_max_age_days')
+        self.fingerprint_max_age = max_age_days * 86400 if max_age_days else None
+
+    @property
+    def concurrency_key(self):
+        """Sources with the same key share one concurrency limit"""
+        return self.type_name
+
+    def cache_key(self, kind):
+        """HTTP cache key for one kind of response, or None when caching is off"""
+        return f'tracker.{kind}:{self.company}' if self.cache else None
+
+    def scrape(self, context):
+        """Return this source's articles, newest first"""
+        raise NotImplementedError
+
+    def problems(self):
+        """Config mistakes that would make this source fail, without fetching anything"""
+        if not self.url:
+            return [f"{self.company}: no 'url'"]
+        return []
+
+
+@register('html')
+class HtmlPlugin(SourcePlugin):
+    """Listing page scraped with the generic extraction plan"""
+
+    def scrape(self, context):
+        return self.scrape_page(self.url, context)
+
+    def scrape_page(self, url, context):
+        return context.fetcher.fetch(url, lambda head: self.parse(head, url, context),
+                                     self.cache_key('html'), max_bytes=self.max_bytes,
+                                     region=lambda content: self.region(content, url, context),
+                                     variant=GENERIC_PLAN.variant(context.limit),
+                                     max_age=self.fingerprint_max_age)
+
+    def parse(self, head, url, context):
+        """Parse the head of a listing page into articles on the parse pool"""
+        return context.pool.parse(parse_listing_head, head, self.company, url, context.limit,
+                                  site=url, hints=context.hints)
+
+    def region(self, content, url, context):
+        """The head of a listing page, the only part parse needs and what gets fingerprinted"""
+        return GENERIC_PLAN.head(content, context.limit, url, context.hints)
+
+    def extract(self, soup, url, context):
+        """Extract articles from a parsed listing page"""
+        return extract_listing(soup, self.company, url, context.limit, context.hints)
+
+
+@register('feed')
+class FeedPlugin(HtmlPlugin):
+    """RSS/Atom feeds, falling back to feeds advertised on the listing page and
+    then to scraping the listing page itself"""
+
+    def __init__(self, company, spec):
+        super().__init__(company, spec)
+        feeds = spec.get('feeds') or spec.get('feed') or []
+        self.feeds = [feeds] if isinstance(feeds, str) else list(feeds)
+
+    def scrape(self, context):
+        candidates = [('feed', feed) for feed in self.feeds]
+        if self.url:
+            candidates.append(('page', self.url))
+        return run_chain(self.company, candidates,
+                         {'feed': lambda url: self.scrape_feed(url, context),
+                          'page': lambda url: self.scrape_page(url, context)},
+                         context.fetcher, discover_from=[self.url] if self.url else [],
+                         endpoints=context.endpoints)
+
+    def problems(self):
+        if not self.feeds and not self.url:
+            return [f"{self.company}: feed plugin needs 'feeds' or a 'url' to discover them on"]
+        return []
+
+    def scrape_feed(self, url, context):
+        return context.fetcher.fetch(url, lambda stream: self.parse_feed(stream, context),
+                                     self.cache_key('feed'), stream=True, max_bytes=self.max_bytes)
+
+    def parse_feed(self, stream, context):
+        """Parse a streamed feed into articles"""
+        return feed_articles(stream, limit=context.limit, company=self.company,
+                             scraped_at=batch_timestamp())
+
+
+@register('custom')
+class CustomPlugin(SourcePlugin):
+    """Any scraper function, such as a standalone scraper's entry point
+
+    The function is called without arguments and returns article dicts. It
+    should fetch through fetcher.default_fetcher(), which the tracker points
+    at its own rate-limited session.
+    """
+
+    # Hints that only apply to fetches the plugin makes itself
+    FETCH_HINTS = ('cache', 'max_bytes', 'fingerprint_max_age_days')
+
+    def __init__(self, company, spec):
+        super().__init__(company, spec)
+        if 'entry' not in spec:
+            raise ValueError(f"Custom plugin for {company} needs an 'entry': 'module:function'")
+        self.entry = spec['entry']
+        self.function = None
+
+    @property
+    def concurrency_key(self):
+        return self.entry
+
+    def problems(self):
+        problems = [f"{self.company}: '{hint}' has no effect on a custom plugin"
+                    for hint in self.FETCH_HINTS if hint in self.spec]
+        module_name, _, attribute = self.entry.partition(':')
+        if not attribute:
+            problems.append(f"{self.company}: entry should be 'module:function', got {self.entry!r}")
+        elif importlib.util.find_spec(module_name) is None:
+            problems.append(f"{self.company}: module {module_name!r} not found")
+        return problems
+
+    def scrape(self, context):
+        if self.function is None:
+            self.function = import_object(self.entry)
+
+        articles = self.function() or []
+        return [as_article(article).replace(company=self.company)
+                for article in articles[:context.limit]]
+
+
+def plugin_type(name):
+    """Look up a registered plugin type, importing "module:Class" types on demand"""
+    if name in PLUGIN_TYPES:
+        return PLUGIN_TYPES[name]
+    if ':' in name:
+        return register(name)(import_object(name))
+    raise ValueError(f"Unknown plugin type {name!r}, expected one of {sorted(PLUGIN_TYPES)}")
+
+
+def load_plugins(competitors):
+    """Build one plugin per competitor, in config order"""
+    plugins = []
+    for company, spec in competitors.items():
+        if isinstance(spec, str):
+            spec = {'type': 'html', 'url': spec}
+        plugins.append(plugin_type(spec.get('type', 'html'))(company, spec))
+    return plugins
+
+
+def batches(plugins):
+    """Group plugins by their batch hint, lowest batch first, keeping config order"""
+    grouped = {}
+    for plugin in plugins:
+        grouped.setdefault(plugin.batch, []).append(plugin)
+    return [grouped[batch] for batch in sorted(grouped)]
+
+
+class ConcurrencyLimits:
+    """One semaphore per concurrency key, sized by the smallest hint declared for it"""
+
+    def __init__(self, plugins):
+        sizes = {}
+        for plugin in plugins:
+            if plugin.concurrency:
+                key = plugin.concurrency_key
+                sizes[key] = min(sizes.get(key, plugin.concurrency), plugin.concurrency)
+        self.semaphores = {key: threading.Semaphore(max(1, size)) for key, size in sizes.items()}
+
+    def slot(self, plugin):
+        """Context manager held while plugin scrapes"""
+        return self.semaphores.get(plugin.concurrency_key) or contextlib.nullcontext()
+
+
+def parse_listing(content, company, url, limit, hints=None):
+    """Parse the head of a listing page with the generic plan"""
+    return parse_listing_head(GENERIC_PLAN.head(content, limit, url, hints), company, url, limit, hints)
+
+
+def parse_listing_head(head, company, url, limit, hints=None):
+    """Parse a head cut by GENERIC_PLAN.head (runs in a parse worker)"""
+    return extract_listing(parse_html(head), company, url, limit, hints)
+
+
+def extract_listing(soup, company, url, limit, hints=None):
+    """Extract articles from a parsed listing page with the generic plan"""
+    articles = []
+    scraped_at = batch_timestamp()
+
+    # Look for common article patterns
+    _, elements = GENERIC_PLAN.select_containers(soup, url, hints)
+    for element in elements[:limit]:
+        fields = GENERIC_PLAN.match_fields(element)
+        title = extract_text(fields['title'])
+        link = extract_link(fields['link'], url)
+        date = extract_text(fields['date'])
+        # A <time datetime> attribute is more exact than the text shown
+        published = to_timestamp(fields['date'].get('datetime')) if fields['date'] else 0
+
+        if title:
+            articles.append(Article(title, link, company=company, date=date,
+                                    scraped_at=scraped_at, published=published))
+
+    return articles
+
+
+def extract_text(element):
+    """Stripped text of a matched element"""
+    if element:
+        return element.get_text().strip()
+    return None
+
+
+def extract_link(link_elem, base_url):
+    """Absolute URL of a matched link element"""
+    if link_elem and link_elem.get('href'):
+        href = link_elem['href']
+        if href.startswith('http'):
+            return href
+        else:
+            return urljoin(base_url, href)
+    return None
@@ -0,0 +1,129 @@
+"""
+Rate Limiter
+Per-host token buckets that keep concurrent scans polite
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+import metrics
+
+
+def domain_key(host, keys):
+    """The entry of keys covering host (host itself or a parent domain), or host itself"""
+    parts = host.split('.')
+    for i in range(len(parts)):
+        candidate = '.'.join(parts[i:])
+        if candidate in keys:
+            return candidate
+    return host
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it"""
+        if not self.rate:
+            return 0
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Going negative queues callers behind each other in arrival order
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """Block until a token is available and return the seconds waited"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """Hands out one token bucket per host, with per-domain overrides
+
+    An override keyed by a parent domain (e.g. "google") is shared by every
+    host under it, so blog.google and deepmind.google draw from one bucket.
+    """
+
+    def __init__(self, rate, burst=1, overrides=None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build a limiter from the `settings` block of config.json"""
+        limits = dict(settings.get('rate_limits', {}))
+        default = limits.pop('default', {})
+        delay = settings.get('request_delay', 2)
+
+        rate = default.get('requests_per_second', 1 / delay if delay else 0)
+        burst = default.get('burst', 1)
+        return cls(rate, burst, limits)
+
+    def bucket_key(self, host):
+        """Return the override key covering host, or host itself"""
+        return domain_key(host, self.overrides)
+
+    def bucket_for(self, url):
+        """Return the token bucket responsible for url's host"""
+        host = (urlparse(url).hostname or '').lower()
+        key = self.bucket_key(host)
+
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                override = self.overrides.get(key, {})
+                bucket = TokenBucket(override.get('requests_per_second', self.rate),
+                                     override.get('burst', self.burst))
+                self.buckets[key] = bucket
+            return bucket
+
+    def acquire(self, url):
+        """Block until a request to url is allowed and return the seconds waited"""
+        return self.bucket_for(url).acquire()
+
+
+class RateLimitAdapter(BaseAdapter):
+    """Transport adapter that waits on the host's bucket, then sends through `adapter`"""
+
+    def __init__(self, limiter, adapter=None):
+        super().__init__()
+        self.limiter = limiter
+        self.adapter = adapter or HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        # Remember the wait so latency measurements can leave it out
+        request.throttle_wait = self.limiter.acquire(request.url)
+        metrics.observe('throttle', request.throttle_wait)
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+def install_rate_limiter(session, limiter):
+    """Rate limit a requests.Session in front of the adapter it already has mounted"""
+    adapter = RateLimitAdapter(limiter, session.get_adapter('https://'))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
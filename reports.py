@@ -0,0 +1,201 @@
+"""
+Reports
+Writers that render the scan report one competitor section at a time, in
+markdown, HTML or JSON, so a report never has to be held in memory
+"""
+
+import html
+import json
+import os
+from datetime import datetime, timezone
+
+
+def display_date(article):
+    """The article's date as YYYY-MM-DD (UTC) when it could be read, else as scraped"""
+    if article.published:
+        return datetime.fromtimestamp(article.published, timezone.utc).strftime('%Y-%m-%d')
+    return article.date or 'Date not found'
+
+
+class ReportWriter:
+    """Renders a report to a text stream: begin(), section() per competitor, end()
+
+    The stream can be anything with write(): a file, io.StringIO, or
+    socket.makefile('w') to send the report as it is produced. The summary
+    goes last because the total isn't known until the scan is over.
+    """
+
+    extension = None
+
+    def __init__(self, out):
+        self.out = out
+        self.total = 0
+
+    def begin(self, generated):
+        pass
+
+    def section(self, company, articles):
+        self.total += len(articles)
+
+    def end(self):
+        pass
+
+
+class MarkdownReport(ReportWriter):
+    extension = 'md'
+
+    def begin(self, generated):
+        self.out.write(f"# AI Competitor Intelligence Report - {generated:%Y-%m-%d}\n\n"
+                       f"Generated on: {generated:%Y-%m-%d %H:%M:%S}\n\n")
+
+    def section(self, company, articles):
+        super().section(company, articles)
+        write = self.out.write
+        write(f"## {company}\n\n")
+        for article in articles:
+            write(f"- **{article.title}**\n"
+                  f"  - Link: {article.link or 'No link available'}\n"
+                  f"  - Date: {display_date(article)}\n\n")
+
+    def end(self):
+        self.out.write(f"## Summary\n"
+                       f"Found {self.total} recent articles/updates across competitors.\n")
+
+
+class HtmlReport(ReportWriter):
+    extension = 'html'
+
+    def begin(self, generated):
+        title = f"AI Competitor Intelligence Report - {generated:%Y-%m-%d}"
+        self.out.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+                       f'<title>{title}</title>\n</head>\n<body>\n<h1>{title}</h1>\n'
+                       f'<p>Generated on: {generated:%Y-%m-%d %H:%M:%S}</p>\n')
+
+    def section(self, company, articles):
+        super().section(company, articles)
+        write = self.out.write
+        write(f"<h2>{html.escape(company)}</h2>\n<ul>\n")
+        for article in articles:
+            title = html.escape(article.title)
+            if article.link:
+                title = f'<a href="{html.escape(article.link)}">{title}</a>'
+            write(f"<li>{title} <small>{html.escape(display_date(article))}</small></li>\n")
+        write("</ul>\n")
+
+    def end(self):
+        self.out.write(f"<h2>Summary</h2>\n"
+                       f"<p>Found {self.total} recent articles/updates across competitors.</p>\n"
+                       f"</body>\n</html>\n")
+
+
+class JsonReport(ReportWriter):
+    extension = 'json'
+
+    def begin(self, generated):
+        self.out.write(f'{{"generated": {json.dumps(generated.isoformat())}, "competitors": [')
+        self.separator = '\n'
+
+    def section(self, company, articles):
+        super().section(company, articles)
+        self.out.write(f'{self.separator}{{"company": {json.dumps(company)}, "articles": [')
+        self.out.write(', '.join(json.dumps(article.to_dict()) for article in articles))
+        self.out.write(']}')
+        self.separator = ',\n'
+
+    def end(self):
+        self.out.write(f'\n], "total": {self.total}}}\n')
+
+
+FORMATS = {
+    'markdown': MarkdownReport,
+    'html': HtmlReport,
+    'json': JsonReport,
+}
+
+
+class AtomicFile:
+    """Text file written under a temporary name and renamed into place on commit()
+
+    Readers of path only ever see the previous file or the complete new one.
+    """
+
+    def __init__(self, path):
+        import tempfile
+
+        self.path = path
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.",
+                                             suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+
+    def write(self, text):
+        return self.file.write(text)
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+
+class ReportSet:
+    """One report written in several formats in the same pass
+
+    Use as a context manager: the files are renamed into place when the block
+    finishes, and thrown away if it raises, so a failed scan leaves the last
+    complete report in place.
+    """
+
+    def __init__(self, directory, basename, formats=('markdown',)):
+        unknown = [name for name in formats if name not in FORMATS]
+        if unknown:
+            raise ValueError(f"unknown report format(s) {', '.join(unknown)}; "
+                             f"expected {', '.join(FORMATS)}")
+        self.files = []
+        self.writers = []
+        for name in formats:
+            writer_class = FORMATS[name]
+            out = AtomicFile(os.path.join(directory, f"{basename}.{writer_class.extension}"))
+            self.files.append(out)
+            self.writers.append(writer_class(out))
+
+    @classmethod
+    def from_settings(cls, settings, basename):
+        """Reports in settings.report_formats under settings.report_dir"""
+        return cls(settings.get('report_dir', 'reports'), basename,
+                   settings.get('report_formats', ['markdown']))
+
+    @property
+    def paths(self):
+        return [out.path for out in self.files]
+
+    def begin(self, generated):
+        for writer in self.writers:
+            writer.begin(generated)
+
+    def section(self, company, articles):
+        for writer in self.writers:
+            writer.section(company, articles)
+
+    def end(self):
+        for writer in self.writers:
+            writer.end()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for out in self.files:
+            if exc_type is None:
+                out.commit()
+            else:
+                out.discard()
+        return False
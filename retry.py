@@ -0,0 +1,139 @@
+"""
+Retries and Circuit Breaking
+Exponential backoff with jitter, adaptive timeouts, and a persisted per-URL
+circuit breaker so dead or hung sources stop costing every scan a timeout
+"""
+
+import random
+import threading
+import time
+
+import db
+from settings import state_path
+
+# Responses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+BREAKER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS endpoints (
+    url TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    opened_until REAL NOT NULL,
+    latency REAL
+);
+"""
+
+
+class CircuitOpenError(IOError):
+    """Raised instead of requesting a URL whose circuit is open
+
+    An IOError like requests' own exceptions, without importing requests.
+    """
+
+
+class RetryPolicy:
+    """How many times to retry and how long to back off in between"""
+
+    def __init__(self, retries=2, backoff=0.5, max_backoff=30):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('retries', 2), settings.get('retry_backoff', 0.5))
+
+    def delay(self, attempt, response=None):
+        """Seconds to wait before retry number attempt (0-based)
+
+        Uses "full jitter" exponential backoff, but honours a server's
+        Retry-After header when it asks for something reasonable.
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    seconds = None
+            if seconds is not None:
+                return min(max(seconds, 0), self.max_backoff)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-URL failure and latency history, persisted between runs
+
+    After `threshold` consecutive failures (errors, 4xx/5xx, or responses
+    slower than `slow_fraction` of the timeout) a URL is skipped for
+    `cooldown` seconds, doubling each time it fails again after reopening.
+    The smoothed latency of each URL also sets its timeout, so fast sources
+    fail fast while `timeout` stays the ceiling.
+    """
+
+    def __init__(self, path, threshold=3, cooldown=3600, timeout=10,
+                 min_timeout=3, slow_fraction=0.8):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.slow_fraction = slow_fraction
+        self.conn = db.connect(path)
+        self.conn.executescript(BREAKER_SCHEMA)
+        self.lock = threading.Lock()
+        self.state = {url: [failures, opened_until, latency] for url, failures, opened_until, latency
+                      in self.conn.execute('SELECT url, failures, opened_until, latency FROM endpoints')}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(state_path(settings, 'breaker.db'),
+                   threshold=settings.get('breaker_threshold', 3),
+                   cooldown=settings.get('breaker_cooldown', 3600),
+                   timeout=settings.get('timeout', 10))
+
+    def check(self, url):
+        """Raise CircuitOpenError if url is still cooling down"""
+        state = self.state.get(url)
+        if state and state[1] > time.time():
+            raise CircuitOpenError(f"circuit open for {url} after {state[0]} failures, "
+                                   f"retrying after {time.strftime('%H:%M', time.localtime(state[1]))}")
+
+    def timeout_for(self, url):
+        """Timeout for the next request: a multiple of the URL's usual latency"""
+        state = self.state.get(url)
+        if not state or state[2] is None:
+            return self.timeout
+        return min(self.timeout, max(self.min_timeout, state[2] * 4 + 1))
+
+    def record_success(self, url, latency):
+        """Note a good response, counting it as a strike if it was very slow"""
+        if latency >= self.slow_fraction * self.timeout:
+            self.record_failure(url, latency)
+            return
+
+        with self.lock:
+            state = self.state.setdefault(url, [0, 0.0, None])
+            state[0] = 0
+            state[1] = 0.0
+            state[2] = latency if state[2] is None else 0.7 * state[2] + 0.3 * latency
+            self.save(url, state)
+
+    def record_failure(self, url, latency=None):
+        """Note a failed request, opening the circuit once failures pile up"""
+        with self.lock:
+            state = self.state.setdefault(url, [0, 0.0, None])
+            state[0] += 1
+            if latency is not None:
+                state[2] = latency if state[2] is None else 0.7 * state[2] + 0.3 * latency
+            if state[0] >= self.threshold:
+                backoff = min(2 ** (state[0] - self.threshold), 24)
+                state[1] = time.time() + self.cooldown * backoff
+            self.save(url, state)
+
+    def save(self, url, state):
+        self.conn.execute('INSERT OR REPLACE INTO endpoints VALUES (?, ?, ?, ?)', (url, *state))
+        self.conn.commit()
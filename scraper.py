@@ -4,259 +4,357 @@ AI Competitor Tracker - Web Scraper
 Monitors AI companies and generates competitive intelligence reports
 """
 
-import json
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+import argparse
+from datetime import datetime, timedelta, timezone
+import io
 import os
+import sys
 import time
-import xml.etree.ElementTree as ET
+
+import metrics
+from html_parsing import BACKENDS, DEFAULT_BACKEND, set_backend
+from plugins import ConcurrencyLimits, ScanContext, batches, load_plugins
+from settings import CONFIG_PATH, load_config, state_path
+
+# requests, bs4, lxml, the XML parser, SQLite and the report writers load on
+# first use, so --check and --dry-run never import them and `import scraper`
+# stays within its startup budget; keep it that way when adding imports here
 
 class CompetitorTracker:
     def __init__(self, config_path='config.json'):
         """Initialize the tracker with configuration"""
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
-
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-
-    def scrape_website(self, company, url):
-        """Scrape a single website for news and updates"""
-        # Use specialized scraper for specific companies
-        if company == "Google AI":
-            return self.scrape_google_ai()
-        elif company == "OpenAI":
-            return self.scrape_openai_rss()
-        else:
-            return self.scrape_generic_website(company, url)
-
-    def scrape_openai_rss(self):
-        """Scrape OpenAI using RSS feed"""
-        try:
-            response = self.session.get("https://openai.com/blog/rss.xml", timeout=10)
-            response.raise_for_status()
-
-            root = ET.fromstring(response.content)
-            articles = []
-
-            items = root.findall('.//item')
-            for item in items[:5]:  # Get first 5
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                desc_elem = item.find('description')
-                date_elem = item.find('pubDate')
-
-                if title_elem is not None:
-                    articles.append({
-                        'title': title_elem.text,
-                        'link': link_elem.text if link_elem is not None else '',
-                        'description': desc_elem.text if desc_elem is not None else '',
-                        'date': date_elem.text if date_elem is not None else '',
-                        'company': 'OpenAI'
-                    })
-
-            return articles
-
-        except Exception as e:
-            print(f"Error scraping OpenAI RSS: {str(e)}")
-            return []
-
-    def scrape_google_ai(self):
-        """Scrape Google AI blog"""
-        try:
-            # Try direct scraping of Google AI blog
-            response = self.session.get("https://blog.google/technology/ai/", timeout=15)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            articles = []
-
-            # Look for AI article links
-            selectors = [
-                'a[href*="/technology/ai/"]:not([href*="twitter"]):not([href*="facebook"]):not([href*="linkedin"])',
-                'h2 a[href*="/technology/ai/"]',
-                'h3 a[href*="/technology/ai/"]'
-            ]
-
-            for selector in selectors:
-                elements = soup.select(selector)
-                if elements:
-                    for element in elements[:5]:
-                        title = element.get_text().strip()
-                        link = element.get('href')
-
-                        if title and len(title) > 5:
-                            if not link.startswith('http'):
-                                link = f"https://blog.google{link}"
-
-                            # Try to find description
-                            description = ""
-                            parent = element.find_parent()
-                            if parent:
-                                desc_elem = parent.find('p')
-                                if desc_elem:
-                                    description = desc_elem.get_text().strip()[:200]
-
-                            articles.append({
-                                'title': title,
-                                'link': link,
-                                'description': description,
-                                'date': '',
-                                'company': 'Google AI'
-                            })
-                    break
-
-            return articles
-
-        except Exception as e:
-            print(f"Error scraping Google AI: {str(e)}")
-            return []
-
-    def scrape_generic_website(self, company, url):
-        """Scrape a generic website for news and updates"""
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Extract basic information
-            articles = []
-
-            # Look for common article patterns
-            article_selectors = [
-                'article',
-                '.blog-post',
-                '.news-item',
-                '.post',
-                '[class*="article"]'
-            ]
-
-            for selector in article_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    for element in elements[:5]:  # Limit to first 5
-                        title = self.extract_title(element)
-                        link = self.extract_link(element, url)
-                        date = self.extract_date(element)
-
-                        if title:
-                            articles.append({
-                                'title': title,
-                                'link': link,
-                                'date': date,
-                                'company': company
-                            })
-                    break
-
-            return articles
-
-        except Exception as e:
-            print(f"Error scraping {company} ({url}): {str(e)}")
-            return []
-
-    def extract_title(self, element):
-        """Extract article title from element"""
-        title_selectors = ['h1', 'h2', 'h3', '.title', '[class*="title"]']
-        for selector in title_selectors:
-            title_elem = element.select_one(selector)
-            if title_elem:
-                return title_elem.get_text().strip()
-        return None
-
-    def extract_link(self, element, base_url):
-        """Extract article link from element"""
-        link_elem = element.select_one('a')
-        if link_elem and link_elem.get('href'):
-            href = link_elem['href']
-            if href.startswith('http'):
-                return href
-            else:
-                from urllib.parse import urljoin
-                return urljoin(base_url, href)
-        return None
-
-    def extract_date(self, element):
-        """Extract article date from element"""
-        date_selectors = ['time', '.date', '[class*="date"]', '[datetime]']
-        for selector in date_selectors:
-            date_elem = element.select_one(selector)
-            if date_elem:
-                return date_elem.get_text().strip()
-        return None
+        from discovery import EndpointCache, set_default_endpoints
+        from extraction import SelectorHints, set_default_hints
+        from fetcher import Fetcher, set_default_fetcher
+        from parse_pool import ParsePool, set_default_parse_pool
+        from rate_limiter import HostRateLimiter
+        from transport import build_session
+
+        self.config = load_config(config_path)
+        set_backend(self.config['settings'].get('html_parser', DEFAULT_BACKEND))
+        metrics.configure(self.config['settings'])
+
+        # Throttle per host inside the session so scan workers stay polite
+        self.rate_limiter = HostRateLimiter.from_settings(self.config['settings'])
+        self.session = build_session(self.config['settings'], self.rate_limiter)
+
+        # Conditional GETs let unchanged pages skip download and parsing, and the
+        # circuit breaker keeps dead sources from eating a timeout every scan
+        self.fetcher = Fetcher.from_settings(self.config['settings'], self.session)
+        self.selector_hints = SelectorHints.from_settings(self.config['settings'])
+
+        # Scan threads only download; pages are parsed on worker processes
+        self.parse_pool = ParsePool.from_settings(self.config['settings'])
+
+        self.endpoints = EndpointCache.from_settings(self.config['settings'])
+
+        # Custom plugins reuse the standalone scrapers, which fetch, parse and
+        # keep state through the defaults; point those at this tracker's
+        set_default_fetcher(self.fetcher)
+        set_default_parse_pool(self.parse_pool)
+        set_default_endpoints(self.endpoints)
+        set_default_hints(self.selector_hints)
+
+        self.plugins = load_plugins(self.config['competitors'])
+        self.limits = ConcurrencyLimits(self.plugins)
+        self.context = ScanContext(self.fetcher, self.selector_hints, self.endpoints,
+                                   self.config['settings'].get('max_articles_per_site', 5),
+                                   self.parse_pool)
+
+    def scrape_competitor(self, plugin):
+        """Scrape one configured competitor (runs on a scan worker thread)"""
+        print(f"Scraping {plugin.company}...")
+        with self.limits.slot(plugin), metrics.source(plugin.company), metrics.stage('scrape'):
+            try:
+                return plugin.scrape(self.context)
+            except Exception as e:
+                print(f"Error scraping {plugin.company}: {str(e)}")
+                return []
+
+    def scan(self):
+        """Scrape all configured competitors concurrently, one batch at a time
+
+        Yields (plugin, articles) in config order, each as soon as it and the
+        competitors before it are done, so callers can stream the results.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        max_workers = self.config['settings'].get('max_workers', 8)
+        results = {}
+        order = iter(self.plugins)
+        pending = next(order, None)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for batch in batches(self.plugins):
+                for plugin, articles in zip(batch, executor.map(self.scrape_competitor, batch)):
+                    results[plugin.company] = articles
+                    # Hand results on in config order whatever order the batches ran in
+                    while pending is not None and pending.company in results:
+                        yield pending, results.pop(pending.company)
+                        pending = next(order, None)
 
     def scrape_all_competitors(self):
-        """Scrape all configured competitors"""
+        """Scrape all configured competitors and return their articles in config order"""
         all_articles = []
-
-        for company, url in self.config['competitors'].items():
-            print(f"Scraping {company}...")
-            articles = self.scrape_website(company, url)
+        for _, articles in self.scan():
             all_articles.extend(articles)
-            time.sleep(2)  # Be respectful with requests
-
         return all_articles
 
     def generate_report(self, articles):
         """Generate markdown report from scraped articles"""
-        today = datetime.now().strftime('%Y-%m-%d')
-        report_content = f"""# AI Competitor Intelligence Report - {today}
-
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        from reports import MarkdownReport
 
-## Summary
-Found {len(articles)} recent articles/updates across competitors.
-
-"""
-
-        # Group articles by company
         by_company = {}
         for article in articles:
-            company = article['company']
-            if company not in by_company:
-                by_company[company] = []
-            by_company[company].append(article)
+            by_company.setdefault(article.company, []).append(article)
 
-        # Add company sections
+        out = io.StringIO()
+        report = MarkdownReport(out)
+        report.begin(datetime.now())
         for company, company_articles in by_company.items():
-            report_content += f"## {company}\n\n"
-
-            for article in company_articles:
-                title = article['title']
-                link = article['link'] or 'No link available'
-                date = article['date'] or 'Date not found'
-
-                report_content += f"- **{title}**\n"
-                report_content += f"  - Link: {link}\n"
-                report_content += f"  - Date: {date}\n\n"
-
-        return report_content
+            report.section(company, company_articles)
+        report.end()
+        return out.getvalue()
 
     def save_report(self, report_content):
-        """Save report to reports directory"""
-        os.makedirs('reports', exist_ok=True)
-        today = datetime.now().strftime('%Y-%m-%d')
-        filename = f"reports/competitor-report-{today}.md"
+        """Save a markdown report from generate_report() to the report directory
 
-        with open(filename, 'w') as f:
-            f.write(report_content)
+        Kept for callers of the old API; run_daily_scan() writes its reports
+        itself, in every configured format.
+        """
+        from reports import AtomicFile, MarkdownReport
 
-        print(f"Report saved to {filename}")
+        out = AtomicFile(os.path.join(self.config['settings'].get('report_dir', 'reports'),
+                                      f"competitor-report-{datetime.now():%Y-%m-%d}"
+                                      f".{MarkdownReport.extension}"))
+        try:
+            out.write(report_content)
+        except Exception:
+            out.discard()
+            raise
+        out.commit()
+        print(f"Report saved to {out.path}")
+        return out.path
+
+    def run_daily_scan(self, results=None):
+        """Run the complete daily scanning process
+
+        Each competitor's section is written to the reports and its articles
+        added to the history as soon as its scrape finishes; the report files
+        only appear, complete, once the whole scan has succeeded. results are
+        (plugin, articles) pairs in config order, e.g. from the workers of a
+        distributed scan; by default the competitors are scraped here.
+        """
+        from article_store import ArticleStore
+        from near_duplicates import NearDuplicateIndex
+        from reports import ReportSet
 
-    def run_daily_scan(self):
-        """Run the complete daily scanning process"""
         print("Starting AI competitor tracking...")
-        articles = self.scrape_all_competitors()
-        report = self.generate_report(articles)
-        self.save_report(report)
+        settings = self.config['settings']
+        store = ArticleStore.from_settings(settings)
+        run_id = store.start_run('scraper')
+        duplicates = NearDuplicateIndex.from_settings(settings)
+        new_count = 0
+        reported = 0
+        scanned = 0
+
+        reports = ReportSet.from_settings(settings,
+                                          f"competitor-report-{datetime.now():%Y-%m-%d}")
+        with reports:
+            reports.begin(datetime.now())
+            try:
+                for plugin, articles in results if results is not None else self.scan():
+                    new_count += len(store.upsert(articles, run_id))
+                    scanned += len(articles)
+                    # The same announcement on several sites is reported once
+                    articles = duplicates.filter(articles)
+                    reported += len(articles)
+                    # Newest first; articles whose date couldn't be read go last
+                    articles.sort(key=lambda article: article.published, reverse=True)
+                    if articles:
+                        reports.section(plugin.company, articles)
+            finally:
+                self.parse_pool.close()
+            reports.end()
+
+        print(f"{new_count} new articles since the last scan ({store.count()} in history)")
+        if scanned > reported:
+            print(f"{scanned - reported} near-duplicate articles left out of the report")
+        print(f"Report saved to {', '.join(reports.paths)}")
+        metrics.flush()
         print("Daily scan completed!")
 
+def check_config(config):
+    """Problems that would break a scan, found without fetching or parsing anything"""
+    from reports import FORMATS
+
+    settings = config['settings']
+    problems = []
+
+    if not config['competitors']:
+        problems.append("no competitors configured")
+    if settings.get('html_parser', DEFAULT_BACKEND) not in BACKENDS:
+        problems.append(f"html_parser must be one of {', '.join(BACKENDS)}")
+    if settings.get('metrics_format', 'jsonl') not in ('jsonl', 'prometheus'):
+        problems.append("metrics_format must be jsonl or prometheus")
+    if settings.get('scan_workers', 2) < 1:
+        problems.append("scan_workers must be at least 1")
+    if not 0 <= settings.get('near_duplicate_similarity', 0.7) <= 1:
+        problems.append("near_duplicate_similarity must be between 0 and 1")
+    unknown = [name for name in settings.get('report_formats', ['markdown']) if name not in FORMATS]
+    if unknown:
+        problems.append(f"report_formats must be drawn from {', '.join(FORMATS)} "
+                        f"(got {', '.join(unknown)})")
+
+    try:
+        plugins = load_plugins(config['competitors'])
+    except Exception as e:
+        return problems + [str(e)]
+
+    for plugin in plugins:
+        problems.extend(plugin.problems())
+    return problems
+
+def print_scan_plan(config):
+    """Show what a scan would fetch, batch by batch, using only the saved state"""
+    from discovery import EndpointCache
+    from retry import CircuitBreaker
+
+    settings = config['settings']
+    endpoints_path = state_path(settings, 'endpoints.db')
+    breaker_path = state_path(settings, 'breaker.db')
+
+    # Read existing state only; a dry run shouldn't create any files
+    endpoints = EndpointCache.from_settings(settings) if os.path.exists(endpoints_path) else None
+    breaker = CircuitBreaker.from_settings(settings) if os.path.exists(breaker_path) else None
+
+    for number, batch in enumerate(batches(load_plugins(config['competitors'])), 1):
+        print(f"Batch {number}:")
+        for plugin in batch:
+            print(f"  {plugin.company} [{plugin.type_name}] {plugin.url or ''}")
+            known = endpoints.get(plugin.company) if endpoints else None
+            if known:
+                print(f"    remembered {known[0]}: {known[1]}")
+            if breaker and plugin.url:
+                try:
+                    breaker.check(plugin.url)
+                except IOError as e:
+                    print(f"    skipped: {e}")
+
+def date_arg(text):
+    """argparse type for a YYYY-MM-DD date, as midnight UTC like the stored publication dates"""
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a date as YYYY-MM-DD, got {text!r}")
+
+def search_history(config, args):
+    """Print the stored articles matching a search, best match first"""
+    from article_store import ArticleStore
+    from reports import display_date
+
+    settings = config['settings']
+    if not os.path.exists(state_path(settings, 'articles.db')):
+        print("No article history yet; run a scan first")
+        return
+
+    since = args.since
+    if args.days is not None:
+        recent = datetime.now(timezone.utc) - timedelta(days=args.days)
+        since = max(since, recent) if since else recent
+
+    started = time.perf_counter()
+    results = ArticleStore.from_settings(settings).search(' '.join(args.query), args.company,
+                                                          since, args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for article in results:
+        print(f"{article.company or article.source}: {article.title}")
+        print(f"  {article.link or 'No link available'}  {display_date(article)}")
+    print(f"{len(results)} result(s) in {elapsed:.1f} ms")
+
+def coordinate(tracker, config_path, local=False):
+    """Shard a scan over the workers, wait for their articles and write the report
+
+    With local, one worker process per shard is started on this machine.
+    """
+    import subprocess
+
+    from distributed import Coordinator, worker_names
+
+    settings = tracker.config['settings']
+    coordinator = Coordinator.from_settings(tracker.plugins, settings)
+    for worker, plugins in sorted(coordinator.assignments().items()):
+        print(f"{worker}: {', '.join(plugin.company for plugin in plugins)}")
+    scan = coordinator.submit()
+
+    workers = []
+    if local:
+        workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), '--config', config_path,
+                                     'work', name, '--exit-when-idle'])
+                   for name in worker_names(settings)]
+    try:
+        tracker.run_daily_scan(coordinator.results(scan))
+    finally:
+        for worker in workers:
+            worker.wait()
+
 def main():
     """Main entry point"""
-    tracker = CompetitorTracker()
+    parser = argparse.ArgumentParser(description="Scan AI competitors and write a report")
+    parser.add_argument('--config', default=CONFIG_PATH, help="path to config.json")
+    parser.add_argument('--check', action='store_true',
+                        help="validate the config and exit without fetching")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="validate the config, show what a scan would fetch, and exit")
+    commands = parser.add_subparsers(dest='command')
+    search = commands.add_parser('search', help="search the article history")
+    search.add_argument('query', nargs='+', help="words that must all match; end one with * for a prefix")
+    search.add_argument('--company', help="only articles from this competitor")
+    search.add_argument('--days', type=int, help="only articles published in the last N days")
+    search.add_argument('--since', type=date_arg, help="only articles published on or after YYYY-MM-DD")
+    search.add_argument('--limit', type=int, default=20, help="most results to show")
+    commands.add_parser('watch', help="keep running, polling each competitor on its own schedule")
+    coordinate_command = commands.add_parser(
+        'coordinate', help="run a scan sharded over `scan_workers` workers and write the report")
+    coordinate_command.add_argument('--local', action='store_true',
+                                    help="start the workers as processes on this machine")
+    work = commands.add_parser('work', help="scrape the sources a coordinator assigns to one worker")
+    work.add_argument('name', help="worker name, worker-0 to worker-N-1 for N scan_workers")
+    work.add_argument('--exit-when-idle', action='store_true',
+                      help="exit once no work is queued instead of waiting for the next scan")
+    args = parser.parse_args()
+
+    if args.command == 'search':
+        search_history(load_config(args.config), args)
+        return
+
+    if args.check or args.dry_run:
+        config = load_config(args.config)
+        problems = check_config(config)
+        for problem in problems:
+            print(f"Config problem: {problem}")
+        if args.dry_run and not problems:
+            print_scan_plan(config)
+        if problems:
+            sys.exit(1)
+        print("Config OK")
+        return
+
+    tracker = CompetitorTracker(args.config)
+    if args.command == 'watch':
+        from watch import watch
+
+        watch(tracker)
+        return
+    if args.command == 'coordinate':
+        coordinate(tracker, args.config, args.local)
+        return
+    if args.command == 'work':
+        from distributed import work
+
+        work(tracker, args.name, args.exit_when_idle)
+        return
     tracker.run_daily_scan()
 
 if __name__ == "__main__":
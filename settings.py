@@ -0,0 +1,33 @@
+"""
+Settings
+Loads config.json and locates the state the tracker keeps between runs
+"""
+
+import json
+import os
+
+CONFIG_PATH = 'config.json'
+STATE_DIR = '.tracker'
+
+
+def load_config(config_path=CONFIG_PATH):
+    """Load config.json, tolerating a missing file for the standalone scrapers"""
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        config = {}
+
+    config.setdefault('competitors', {})
+    config.setdefault('settings', {})
+    return config
+
+
+def load_settings(config_path=CONFIG_PATH):
+    """Return just the `settings` block of config.json"""
+    return load_config(config_path)['settings']
+
+
+def state_path(settings, filename):
+    """Path of a state file inside settings.state_dir"""
+    return os.path.join(settings.get('state_dir', STATE_DIR), filename)
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article import Article  # noqa: E402
+from article_store import ArticleStore  # noqa: E402
+from scraper import date_arg  # noqa: E402
+
+
+class SinceTimezoneTest(unittest.TestCase):
+    """--since keeps articles published on that day in zones west of UTC"""
+
+    def setUp(self):
+        self.tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ArticleStore(os.path.join(self.directory.name, 'articles.db'))
+        run_id = self.store.start_run('test')
+        self.store.upsert([
+            Article('Agents on the day', 'https://example.com/1', company='Example', date='2024-03-05'),
+            Article('Agents the day before', 'https://example.com/2', company='Example', date='2024-03-04'),
+        ], run_id)
+
+    def tearDown(self):
+        self.store.conn.close()
+        self.directory.cleanup()
+        if self.tz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = self.tz
+        time.tzset()
+
+    def titles(self, since):
+        return [article.title for article in self.store.search('agents', 'Example', since)]
+
+    def test_date_arg(self):
+        self.assertEqual(self.titles(date_arg('2024-03-05')), ['Agents on the day'])
+
+    def test_naive_since(self):
+        self.assertEqual(self.titles(date_arg('2024-03-05').replace(tzinfo=None)), ['Agents on the day'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,284 @@
+"""
+Transport
+The HTTP session every entry point fetches through: pooled keep-alive
+connections sized per host, a process-wide DNS cache, and optional HTTP/2
+"""
+
+import socket
+import threading
+import time
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+
+import metrics
+from rate_limiter import HostRateLimiter, domain_key, install_rate_limiter
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Probe keep-alive connections the OS would otherwise let go stale between polls
+KEEPALIVE_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+class CachedDnsConnection:
+    """Mixin resolving a connection's host through its class's dns_cache, when it has one
+
+    Each address is tried in turn, as urllib3 does with a fresh lookup.
+    """
+
+    dns_cache = None
+
+    def _new_conn(self):
+        if self.dns_cache is None:
+            return super()._new_conn()
+
+        try:
+            addresses = self.dns_cache.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        host = self._dns_host
+        error = None
+        for *_, address in addresses:
+            self._dns_host = address[0]
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as e:
+                error = e
+            finally:
+                self._dns_host = host
+        raise error
+
+
+class TimedHTTPConnection(CachedDnsConnection, HTTPConnection):
+    """Connection that records each new TCP connect"""
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        metrics.observe('connect', time.perf_counter() - started, host=self.host)
+        metrics.count('connections', scheme='http')
+
+
+class TimedHTTPSConnection(CachedDnsConnection, HTTPSConnection):
+    """Connection that records each new TCP connect plus TLS handshake"""
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        metrics.observe('connect', time.perf_counter() - started, host=self.host)
+        metrics.count('connections', scheme='https')
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with keep-alive sockets, per-host pool sizes and connect metrics
+
+    `pool_sizes` maps a host or parent domain (as in rate_limits) to the
+    connections kept open to it; other hosts get `maxsize`. `hosts` is how
+    many hosts' pools are kept before the least recently used is closed.
+    The adapter's connections look hosts up through `dns_cache` if given.
+    """
+
+    def __init__(self, hosts=32, maxsize=8, pool_sizes=None, dns_cache=None):
+        self.pool_sizes = pool_sizes or {}
+        self.dns_cache = dns_cache
+        super().__init__(pool_connections=hosts, pool_maxsize=maxsize)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('socket_options', KEEPALIVE_OPTIONS)
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        if self.dns_cache is None:
+            http, https = TimedHTTPConnectionPool, TimedHTTPSConnectionPool
+        else:
+            # Pools build their connections from a class, so bind the cache to subclasses
+            cache = {'dns_cache': self.dns_cache}
+            http = type('TimedHTTPConnectionPool', (TimedHTTPConnectionPool,), {
+                'ConnectionCls': type('TimedHTTPConnection', (TimedHTTPConnection,), cache)})
+            https = type('TimedHTTPSConnectionPool', (TimedHTTPSConnectionPool,), {
+                'ConnectionCls': type('TimedHTTPSConnection', (TimedHTTPSConnection,), cache)})
+        self.poolmanager.pool_classes_by_scheme = {'http': http, 'https': https}
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        key = domain_key(host_params['host'].lower(), self.pool_sizes)
+        if key in self.pool_sizes:
+            pool_kwargs['maxsize'] = self.pool_sizes[key]
+        return host_params, pool_kwargs
+
+
+class Http2Body:
+    """An httpx response body with the file-like interface requests expects of Response.raw"""
+
+    def __init__(self, response):
+        self.response = response
+        self.chunks = response.iter_bytes()
+        self.buffer = b''
+        self.position = 0
+        self.decode_content = True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size is None or size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        self.position += len(data)
+        return data
+
+    def stream(self, chunk_size=65536, decode_content=True):
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        self.response.close()
+
+
+class Http2Adapter(BaseAdapter):
+    """Sends requests through an httpx client that multiplexes HTTP/2 streams
+
+    One connection per host carries every concurrent request to it. Sessions
+    only mount this when settings.http2 is set and httpx[http2] is installed;
+    per-request verify, cert and proxies are not supported.
+    """
+
+    def __init__(self, max_connections=100):
+        import httpx
+
+        super().__init__()
+        self.client = httpx.Client(http2=True, follow_redirects=False,
+                                   limits=httpx.Limits(max_connections=max_connections))
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        import httpx
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        options = {'timeout': timeout} if timeout else {}
+        try:
+            sent = self.client.send(self.client.build_request(request.method, request.url,
+                                                              headers=dict(request.headers),
+                                                              content=request.body, **options),
+                                    stream=True)
+        except httpx.ConnectTimeout as e:
+            raise requests.ConnectTimeout(e, request=request)
+        except httpx.TimeoutException as e:
+            raise requests.ReadTimeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        metrics.count('responses_by_protocol', version=sent.http_version)
+        response = requests.Response()
+        response.status_code = sent.status_code
+        response.headers = CaseInsensitiveDict(sent.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.reason = sent.reason_phrase
+        response.raw = Http2Body(sent)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+def http2_available():
+    """Whether httpx with HTTP/2 support is installed"""
+    try:
+        import h2  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class DnsCache:
+    """getaddrinfo results kept for `ttl` seconds, shared by the sessions that use it"""
+
+    def __init__(self, ttl=300, resolve=None):
+        self.ttl = ttl
+        self.resolve = resolve or socket.getaddrinfo
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            metrics.count('dns_lookups', result='hit')
+            return entry[1]
+
+        started = time.perf_counter()
+        addresses = self.resolve(host, port, family, type, proto, flags)
+        metrics.observe('dns', time.perf_counter() - started, host=host)
+        metrics.count('dns_lookups', result='miss')
+        now = time.monotonic()
+        with self.lock:
+            # Lookups are rare next to hits, so dropping expired entries here keeps the cache small
+            self.entries = {key: entry for key, entry in self.entries.items() if entry[0] > now}
+            self.entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+
+_dns_cache = None
+
+
+def shared_dns_cache(ttl=300):
+    """The DnsCache shared by this process's sessions, or None when ttl is 0"""
+    global _dns_cache
+    if not ttl:
+        return None
+    if _dns_cache is None:
+        _dns_cache = DnsCache(ttl)
+    _dns_cache.ttl = ttl
+    return _dns_cache
+
+
+def build_session(settings, limiter=None):
+    """requests.Session tuned from config.json settings, rate limited per host
+
+    Connections are pooled and kept alive across requests and scrapers, so
+    repeated probes of one host pay for a single TCP and TLS handshake.
+    """
+    import requests
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': settings.get('user_agent', DEFAULT_USER_AGENT)})
+
+    if settings.get('http2') and http2_available():
+        adapter = Http2Adapter()
+    else:
+        if settings.get('http2'):
+            print("http2 is set but httpx[http2] is not installed; using HTTP/1.1")
+        adapter = PooledAdapter(settings.get('pool_hosts', 32),
+                                settings.get('pool_maxsize', settings.get('max_workers', 8)),
+                                settings.get('pool_sizes'),
+                                shared_dns_cache(settings.get('dns_cache_ttl', 300)))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    install_rate_limiter(session, limiter or HostRateLimiter.from_settings(settings))
+    return session
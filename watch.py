@@ -0,0 +1,202 @@
+"""
+Watch Mode
+Long-running scheduler that polls each source on its own interval, learned
+from how often the source posts, instead of scanning everything at once
+"""
+
+import asyncio
+import heapq
+import random
+import signal
+import threading
+import time
+
+import db
+import metrics
+from article_store import ArticleStore
+from near_duplicates import NearDuplicateIndex
+from settings import state_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS schedule (
+    source TEXT PRIMARY KEY,
+    interval REAL NOT NULL,
+    next_poll REAL NOT NULL
+);
+"""
+
+# Poll a source about this many times between two of its posts
+POLLS_PER_POST = 4
+# Interval growth after a poll that found nothing new
+BACKOFF = 1.5
+JITTER = 0.1
+
+
+def posting_gap(articles):
+    """Average seconds between the source's posts, from the dates on its listing, or None"""
+    published = sorted(article.published for article in articles if article.published)
+    if len(published) < 2 or published[-1] == published[0]:
+        return None
+    return (published[-1] - published[0]) / (len(published) - 1)
+
+
+class PollSchedule:
+    """When each source is next polled, kept in SQLite so restarts resume it
+
+    A poll that finds new articles sets the interval from the source's
+    posting rate (POLLS_PER_POST polls per post); one that finds nothing
+    backs off by BACKOFF. Intervals stay within [min_interval, max_interval].
+    """
+
+    def __init__(self, path, min_interval=900, max_interval=2 * 86400):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.conn = db.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.entries = {source: (interval, next_poll) for source, interval, next_poll
+                        in self.conn.execute('SELECT source, interval, next_poll FROM schedule')}
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Open the schedule configured in config.json settings"""
+        return cls(state_path(settings, 'schedule.db'),
+                   settings.get('watch_min_interval', 900),
+                   settings.get('watch_max_interval', 2 * 86400))
+
+    def next_poll(self, source):
+        """When source is next due; sources never polled are due now"""
+        entry = self.entries.get(source)
+        return entry[1] if entry else time.time()
+
+    def record(self, source, articles, new_count, min_interval=None):
+        """Adapt source's interval to one poll's result and return when it is next due"""
+        low = max(self.min_interval, min_interval or 0)
+        interval = self.entries.get(source, (low, 0))[0]
+
+        if new_count:
+            gap = posting_gap(articles)
+            interval = gap / POLLS_PER_POST if gap else interval / BACKOFF
+        else:
+            interval *= BACKOFF
+        interval = min(self.max_interval, max(low, interval))
+
+        # Jitter keeps sources added together from staying in lockstep
+        next_poll = time.time() + interval * random.uniform(1 - JITTER, 1 + JITTER)
+        with self.lock:
+            self.entries[source] = (interval, next_poll)
+            self.conn.execute('INSERT OR REPLACE INTO schedule VALUES (?, ?, ?)',
+                              (source, interval, next_poll))
+            self.conn.commit()
+        return next_poll
+
+
+class Watcher:
+    """Polls the tracker's sources whenever they are due, forever
+
+    Only `concurrency` sources are polled at a time, each on a worker thread
+    using the tracker's shared session, so the number of open sockets stays
+    bounded however many sources are watched; the rest wait in a heap
+    ordered by due time and cost nothing.
+    """
+
+    def __init__(self, tracker, schedule, store, duplicates, concurrency=8):
+        self.tracker = tracker
+        self.schedule = schedule
+        self.store = store
+        self.duplicates = duplicates
+        self.concurrency = max(1, concurrency)
+
+    @classmethod
+    def from_settings(cls, tracker, settings):
+        return cls(tracker, PollSchedule.from_settings(settings),
+                   ArticleStore.from_settings(settings), NearDuplicateIndex.from_settings(settings),
+                   settings.get('watch_concurrency', settings.get('max_workers', 8)))
+
+    def poll(self, plugin):
+        """Scrape one source and record what it found (runs on a worker thread)"""
+        articles = self.tracker.scrape_competitor(plugin)
+        run_id = self.store.start_run('watch')
+        new_articles = self.duplicates.filter(self.store.upsert(articles, run_id))
+        if new_articles:
+            print('\n'.join(f"New from {plugin.company}: {article.title} ({article.link or 'no link'})"
+                            for article in new_articles))
+        metrics.flush()
+        return self.schedule.record(plugin.company, articles, len(new_articles),
+                                    plugin.poll_interval)
+
+    async def run(self, stop=None):
+        """Poll until stop is set, then wait for the polls in flight"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        stop = stop or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+        due = [(self.schedule.next_poll(plugin.company), order, plugin)
+               for order, plugin in enumerate(self.tracker.plugins)]
+        heapq.heapify(due)
+        wakeup = asyncio.Event()
+        running = set()
+
+        async def poll(order, plugin):
+            try:
+                next_poll = await loop.run_in_executor(executor, self.poll, plugin)
+            except Exception as e:
+                print(f"Error polling {plugin.company}: {str(e)}")
+                next_poll = time.time() + self.schedule.min_interval
+            finally:
+                slots.release()
+            heapq.heappush(due, (next_poll, order, plugin))
+            wakeup.set()
+
+        print(f"Watching {len(due)} sources, {self.concurrency} at a time")
+        try:
+            while not stop.is_set():
+                delay = due[0][0] - time.time() if due else None
+                if delay is None or delay > 0:
+                    # Sleep until the next source is due, a poll reschedules, or we're stopped
+                    wakeup.clear()
+                    waiters = [asyncio.ensure_future(wakeup.wait()), asyncio.ensure_future(stop.wait())]
+                    await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    for waiter in waiters:
+                        waiter.cancel()
+                    continue
+
+                # Wait for a free slot, unless we're stopped first
+                acquire = asyncio.ensure_future(slots.acquire())
+                stopped = asyncio.ensure_future(stop.wait())
+                await asyncio.wait([acquire, stopped], return_when=asyncio.FIRST_COMPLETED)
+                stopped.cancel()
+                if not acquire.done():
+                    acquire.cancel()
+                    await asyncio.wait([acquire])
+                if stop.is_set():
+                    if not acquire.cancelled():
+                        slots.release()
+                    break
+                _, order, plugin = heapq.heappop(due)
+                task = asyncio.ensure_future(poll(order, plugin))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            if running:
+                await asyncio.wait(running)
+            executor.shutdown()
+
+
+def watch(tracker):
+    """Run a Watcher for tracker until SIGINT or SIGTERM"""
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await Watcher.from_settings(tracker, tracker.config['settings']).run(stop)
+
+    try:
+        asyncio.run(main())
+    finally:
+        tracker.parse_pool.close()
+        metrics.flush()
+    print("Watch stopped")